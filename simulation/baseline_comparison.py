@@ -8,17 +8,40 @@ This script compares C-SMC against standard control methods:
 4. Proposed C-SMC
 
 Outputs a comparison table showing success rate, avg error, and chattering.
+All trajectories are kept in memory-mapped stores under baseline_traces/.
 """
 
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import sem
 
+from csmc import (run, record_ensemble, run_sequential, TrajectoryStore, ResultCache,
+                  DoubleWell, Disturbance, NoControl, PID, RuleBased, CSMC,
+                  Success, MeanAbsError, Chattering)
+from csmc.rare import collapse_probability
+from csmc.variance import antithetic, ou_control, estimate, difference
+
 # Simulation parameters
 T = 1800  # 30 minutes
 dt = 0.01
 t = np.arange(0, T, dt)
 n_trials = 100  # Monte Carlo
+rare_event = False  # Also estimate collapse probabilities below 1/n_trials (splitting)
+
+# Sequential stopping: instead of a fixed n_trials, add batches of n_trials
+# until the success-rate Wilson interval and the error SEM are tight enough
+sequential = False
+success_tol = 0.02    # Largest half-width of the success-rate interval (fraction)
+error_sem_tol = 0.002  # Largest standard error of the mean absolute error
+max_trials = 5000
+
+# Variance reduction: antithetic pairs on explicit common seeds, plus the
+# mean error of an uncontrolled OU on the same noise as control variate.
+# The OU reversion rate roughly matches each closed loop (C-SMC: K / phi).
+variance_reduction = False
+cv_theta = {'none': 4.0, 'pid': 4.0, 'rule': 4.0, 'csmc': 16.0}
 
 # System parameters (Double-Well)
 a = 2.0
@@ -26,90 +49,66 @@ b = 1.0
 sigma = 0.3
 r = 1.0  # Target state
 
-# Disturbance (Panic pulse at t=720-840s)
-def disturbance(t_val):
-    if 720 <= t_val <= 840:
-        return -2.5
-    else:
-        return 0.2 * np.sin(2 * np.pi * t_val / 300)
+# Plant, disturbance (Panic pulse at t=720-840s) and metrics
+plant = DoubleWell(a=a, b=b, sigma=sigma, clip=(-1.5, 1.5))
+disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True)
+metrics = {
+    'success': Success(threshold=0.0),
+    'avg_error': MeanAbsError(r=r),
+    'chattering': Chattering(),
+}
 
 # Controllers
-def no_control(x, t_val):
-    return 0.0
-
-def pid_control(x, t_val, integral, prev_error, Kp=3.0, Ki=0.1, Kd=0.5):
-    """Simple PID controller"""
-    error = r - x
-    integral += error * dt
-    derivative = (error - prev_error) / dt
-    u = Kp * error + Ki * integral + Kd * derivative
-    return np.clip(u, -10, 10), integral, error
-
-def rule_based_control(x, t_val):
-    """Simple threshold-based rule"""
-    if x < 0.5:
-        return 5.0  # Strong intervention
-    elif x < 0.8:
-        return 2.0  # Moderate intervention
-    else:
-        return 0.0  # No intervention
+controllers = {
+    'none': NoControl(),
+    'pid': PID(Kp=3.0, Ki=0.1, Kd=0.5, r=r, dt=dt, u_limit=10.0),
+    'rule': RuleBased(rules=((0.5, 5.0), (0.8, 2.0))),
+    'csmc': CSMC(K=5.0, phi=0.3, r=r),
+}
 
-def csmc_control(x, t_val, K=5.0, phi=0.3):
-    """Proposed C-SMC"""
-    s = x - r
-    u = -K * np.tanh(s / phi)
-    return u
+# Trajectories of every trial are kept on disk (memory-mapped, float32) so the
+# figures slice them instead of re-running the simulation
+trace_dir = 'baseline_traces'
+cache = ResultCache()  # Unchanged ensembles are reused instead of re-simulated
 
 # Simulation function
-def simulate(controller_type, trial_idx=0):
+def simulate_trials(controller_type, trial_indices):
     """
-    Run simulation with specified controller.
+    Run all trials of one controller at once with the batch engine.
+    
+    Trial i is seeded with np.random.seed(trial_indices[i]), exactly as the
+    original one-trial-at-a-time loop. Metrics are accumulated while
+    stepping; the trajectories are written to trace_dir/<controller_type>.
     
     Returns:
-        success: whether state stayed above 0
-        avg_error: mean absolute error from target
-        chattering: number of rapid input changes
+        success: whether state stayed above 0 (per trial)
+        avg_error: mean absolute error from target (per trial)
+        chattering: number of rapid input changes (per trial)
+        store: TrajectoryStore with x (n_trials, len(t)) and u (n_trials, len(t) - 1)
     """
-    np.random.seed(trial_idx)
-    x = np.ones(len(t))
-    u_hist = np.zeros(len(t))
-    
-    # PID state
-    integral = 0.0
-    prev_error = 0.0
-    
-    for i in range(1, len(t)):
-        t_val = t[i]
-        
-        # Control input
-        if controller_type == 'none':
-            u = no_control(x[i-1], t_val)
-        elif controller_type == 'pid':
-            u, integral, prev_error = pid_control(x[i-1], t_val, integral, prev_error)
-        elif controller_type == 'rule':
-            u = rule_based_control(x[i-1], t_val)
-        elif controller_type == 'csmc':
-            u = csmc_control(x[i-1], t_val)
-        
-        u_hist[i] = u
-        
-        # System dynamics
-        d = disturbance(t_val)
-        drift = a * x[i-1] - b * (x[i-1] ** 3)
-        noise = sigma * np.random.randn() * np.sqrt(dt)
-        
-        x[i] = x[i-1] + (drift + u + d) * dt + noise
-        x[i] = np.clip(x[i], -1.5, 1.5)
-    
-    # Metrics
-    success = np.all(x > 0)
-    avg_error = np.mean(np.abs(x - r))
-    
-    # Chattering: count sign changes in control input derivative
-    du = np.diff(u_hist)
-    chattering = np.sum(np.abs(np.diff(np.sign(du))) > 0)
-    
-    return success, avg_error, chattering, x, u_hist
+    # d is evaluated at the time of the new sample, as in the scalar loop.
+    # d(t) and the noise of each seed are shared by all four controllers.
+    store, res = record_ensemble(
+        os.path.join(trace_dir, controller_type), plant, controllers[controller_type],
+        disturbance, t, dt, seeds=list(trial_indices), store_u=True,
+        meta={'script': 'baseline_comparison', 'method': controller_type},
+        metrics=metrics, d_at_next=True, backend='jit', shared=True, cache=cache)
+    return res['success'], res['avg_error'], res['chattering'], store
+
+def run_batch(controller_type, trial_indices):
+    """
+    Per-trial metrics of a batch of trials (dict of metric name -> values).
+
+    The first batch (trials 0, 1, ...) goes through simulate_trials, so its
+    trajectories are stored for the figures; later batches of the sequential
+    mode only accumulate metrics.
+    """
+    if trial_indices[0] == 0:
+        success, error, chatter, _ = simulate_trials(controller_type, trial_indices)
+        return {'success': success, 'avg_error': error, 'chattering': chatter}
+    return run(plant, controllers[controller_type], disturbance, t, dt,
+               seeds=list(trial_indices), metrics=metrics, d_at_next=True,
+               backend='jit', shared=True, cache=cache)
 
 # Run experiments
 print("=" * 70)
@@ -125,18 +124,23 @@ methods = {
 
 results = {}
 
+if sequential:
+    print(f"\nSequential stopping: batches of {n_trials} until the success-rate "
+          f"half-width <= {success_tol * 100:.0f} points and SEM(error) <= {error_sem_tol}")
+    trials = run_sequential(run_batch, methods.values(), batch=n_trials, success='success',
+                            success_tol=success_tol, sem_tol={'avg_error': error_sem_tol},
+                            max_trials=max_trials, verbose=True)
+
 for name, method in methods.items():
     print(f"\nRunning {name}...")
     
-    successes = []
-    errors = []
-    chatterings = []
-    
-    for trial in range(n_trials):
-        success, error, chatter, _, _ = simulate(method, trial)
-        successes.append(success)
-        errors.append(error)
-        chatterings.append(chatter)
+    if sequential:
+        per_trial = trials[method]['values']
+    else:
+        per_trial = run_batch(method, range(n_trials))
+    successes = per_trial['success']
+    errors = per_trial['avg_error']
+    chatterings = per_trial['chattering']
     
     success_rate = np.mean(successes) * 100
     avg_error = np.mean(errors)
@@ -147,9 +151,14 @@ for name, method in methods.items():
         'error': avg_error,
         'error_sem': sem(errors),
         'chattering': avg_chatter,
-        'chattering_sem': sem(chatterings)
+        'chattering_sem': sem(chatterings),
+        'n_trials': len(successes)
     }
+    if sequential:
+        results[name]['success_ci'] = tuple(100 * np.array(trials[method]['ci']))
+        results[name]['converged'] = trials[method]['converged']
     
+    print(f"  Trials: {len(successes)}")
     print(f"  Success Rate: {success_rate:.1f}%")
     print(f"  Avg Error: {avg_error:.3f}")
     print(f"  Chattering Events: {avg_chatter:.1f}")
@@ -162,16 +171,65 @@ print(f"{'Method':<20} {'Success Rate (%)':<20} {'Avg Error':<15} {'Chattering':
 print("-" * 70)
 
 for name in methods.keys():
-    r = results[name]
-    print(f"{name:<20} {r['success_rate']:>18.1f}  {r['error']:>13.3f}  {r['chattering']:>13.1f}")
+    res = results[name]
+    print(f"{name:<20} {res['success_rate']:>18.1f}  {res['error']:>13.3f}  {res['chattering']:>13.1f}")
 
 print("=" * 70)
 
+if variance_reduction:
+    print("\n" + "=" * 70)
+    print(f"VARIANCE REDUCTION ({n_trials // 2} antithetic pairs, common random numbers)")
+    print("=" * 70)
+    seeds = antithetic(range(n_trials // 2))
+    errors = {}
+    print(f"{'Method':<20} {'Avg Error':>10} {'SE plain':>10} {'SE reduced':>11} {'Speedup':>9}")
+    print("-" * 70)
+    for name, method in methods.items():
+        errors[method] = run(plant, controllers[method], disturbance, t, dt, seeds,
+                             metrics={'avg_error': metrics['avg_error']}, d_at_next=True,
+                             backend='jit', shared=True, cache=cache)['avg_error']
+        control = ou_control(plant, metrics['avg_error'], disturbance, t, dt, seeds,
+                             theta=cv_theta[method], mu=r, d_at_next=True,
+                             backend='jit', shared=True, cache=cache)
+        est = estimate(errors[method], control=control, antithetic=True)
+        plain_se = np.std(errors[method], ddof=1) / np.sqrt(len(seeds))
+        results[name]['error_vr'] = est['mean']
+        results[name]['error_vr_sem'] = est['se']
+        print(f"{name:<20} {est['mean']:>10.4f} {plain_se:>10.2e} {est['se']:>11.2e} "
+              f"{est['speedup']:>8.1f}x")
+    print("-" * 70)
+    for name, method in methods.items():
+        if method == 'csmc':
+            continue
+        diff = difference(errors['csmc'], errors[method], antithetic=True)
+        print(f"Error C-SMC - {name:<14} {diff['mean']:>+9.4f} ± {diff['se']:.2e} "
+              f"({diff['speedup']:.1f}x vs independent runs)")
+    print("=" * 70)
+
+# Rare-event mode: a 100% success rate only says P(collapse) < 1/n_trials.
+# Adaptive multilevel splitting resolves the actual collapse probability.
+if rare_event:
+    print("\n" + "=" * 70)
+    print("RARE-EVENT COLLAPSE PROBABILITY (adaptive multilevel splitting)")
+    print("=" * 70)
+    for name, method in methods.items():
+        if results[name]['success_rate'] < 100.0 or method == 'pid':
+            continue  # Collapse is frequent (or the controller has state)
+        res = collapse_probability(plant, controllers[method], disturbance, t, dt,
+                                   n_runs=5, n_particles=100, d_at_next=True)
+        results[name]['p_collapse'] = res['p']
+        print(f"{name:<20} P(collapse) = {res['p']:.2e}  95% CI [{res['ci'][0]:.2e}, "
+              f"{res['ci'][1]:.2e}]  (cost: {res['cost']:.0f} trajectories)")
+    print("=" * 70)
+
 # Visualize one representative run from each method
 fig, axes = plt.subplots(4, 2, figsize=(14, 12))
 
 for idx, (name, method) in enumerate(methods.items()):
-    _, _, _, x_traj, u_traj = simulate(method, trial_idx=42)  # Fixed seed for reproducibility
+    # Trial 42 (seed 42) from the stored ensemble: memory-mapped views, no re-run
+    store = TrajectoryStore.open(os.path.join(trace_dir, method))
+    x_traj = store.x[42]
+    u_traj = np.concatenate([[0.0], store.u[42]])
     
     # Plot state
     ax1 = axes[idx, 0]
@@ -216,9 +274,9 @@ print(r"""
 \midrule""")
 
 for name in methods.keys():
-    r = results[name]
+    res = results[name]
     latex_name = name.replace('C-SMC', r'\textbf{C-SMC}')
-    print(f"{latex_name:<25} & {r['success_rate']:>6.1f} & {r['error']:>6.3f} & {r['chattering']:>6.1f} \\\\")
+    print(f"{latex_name:<25} & {res['success_rate']:>6.1f} & {res['error']:>6.3f} & {res['chattering']:>6.1f} \\\\")
 
 print(r"""\bottomrule
 \end{tabular}
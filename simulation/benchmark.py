@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Simulation Benchmark Suite
+
+Times the hot paths of the project on both backends (NumPy batch engine and
+Numba kernel):
+
+- step_ou / step_ddm / step_dw: one C-SMC trajectory of each plant (30 min)
+- appendix_mc: the 100-trial Monte Carlo of verify_appendix_code.py
+- baseline_4ctrl: the 4-controller x 100-trial comparison of baseline_comparison.py
+- sensitivity_grid: the 3x3 (K, phi) grid of sensitivity_analysis.py
+- sensitivity_tensor: the same grid as one (points x trials) tensor
+  (run_grid, NumPy only)
+- particle_filter: C-SMC on a 10k-particle filter estimate at 100 Hz
+  (state_estimation.py, NumPy only; steps/s above 100 is faster than real time)
+
+For every case it reports transitions/sec (steps x trials), trials/sec and
+the peak traced memory, and writes everything to JSON.  Passing the JSON of
+an earlier run with --compare prints the speed ratios and flags slowdowns,
+so engine changes can be checked before and after.
+
+Usage:
+    python benchmark.py                          # full horizon, both backends
+    python benchmark.py --quick                  # 3 min horizon, fewer trials
+    python benchmark.py --compare old.json       # regression check
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import time as timer
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import csmc
+from csmc import (run, run_sweep, run_grid, trial_seeds, OU, DDM, DoubleWell, Disturbance, NoControl, PID,
+                  RuleBased, CSMC, Compliance, Success, MeanAbsError, Chattering)
+from csmc.filters import ParticleFilter, Filtered
+
+dt = 0.01
+backends = ['numpy', 'jit']
+
+
+# ---------------------------------------------------------
+# Workloads: each returns (n_trials, n_steps) of the work done
+# ---------------------------------------------------------
+def bench_step(plant, T, backend):
+    """Single C-SMC trajectory (the scalar-path scripts: run_ou_all, run_dw_all, ...)"""
+    time = np.arange(0, T, dt)
+    disturbance = Disturbance(amplitude=0.3, period=150, pulse=-2.0)
+    run(plant, CSMC(K=5.0, phi=0.3, r=1.0), disturbance, time, dt, seeds=[0],
+        metrics={'compliance': Compliance(0.8, 1.2)}, backend=backend)
+    return 1, len(time)
+
+
+def bench_appendix(T, n_trials, backend):
+    """verify_appendix_code.py: double-well + C-SMC Monte Carlo"""
+    time = np.linspace(0, T, int(T / dt))
+    run(DoubleWell(a=1.0, b=1.0, sigma=0.1), CSMC(K=5.0, phi=0.3, r=1.0),
+        Disturbance(amplitude=0.5, period=150, pulse=-2.5), time, dt,
+        list(range(n_trials)), x0=0.9, metrics={'compliance': Compliance(0.8, 1.2)},
+        backend=backend)
+    return n_trials, len(time)
+
+
+def bench_baseline(T, n_trials, backend):
+    """baseline_comparison.py: 4 controllers sharing d(t) and the noise of each seed"""
+    time = np.arange(0, T, dt)
+    plant = DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5))
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True)
+    controllers = [NoControl(), PID(Kp=3.0, Ki=0.1, Kd=0.5, r=1.0, dt=dt, u_limit=10.0),
+                   RuleBased(rules=((0.5, 5.0), (0.8, 2.0))), CSMC(K=5.0, phi=0.3, r=1.0)]
+    for controller in controllers:
+        metrics = {'success': Success(0.0), 'avg_error': MeanAbsError(1.0),
+                   'chattering': Chattering()}
+        run(plant, controller, disturbance, time, dt, list(range(n_trials)),
+            metrics=metrics, d_at_next=True, backend=backend, shared=True)
+    return len(controllers) * n_trials, len(time)
+
+
+def grid_point(point, seeds, T, backend):
+    """Sweep job of the sensitivity grid (module level so it pickles)"""
+    K, phi, d_mag = point
+    time = np.arange(0, T, dt)
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=d_mag, replace_wave=True)
+    res = run(DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5)), CSMC(K=K, phi=phi, r=1.0),
+              disturbance, time, dt, seeds, metrics={'success': Success()},
+              d_at_next=True, backend=backend)
+    return res['success']
+
+
+def bench_grid(T, n_trials, backend, n_workers):
+    """sensitivity_analysis.py: K x phi grid through the parallel sweep runner"""
+    points = [(K, phi, -2.5) for K in (3.0, 5.0, 7.0) for phi in (0.2, 0.3, 0.4)]
+    simulate = functools.partial(grid_point, T=T, backend=backend)
+    run_sweep(simulate, points, n_trials, seed=2024, chunk_size=100, n_workers=n_workers)
+    return len(points) * n_trials, int(T / dt)
+
+
+def bench_tensor(T, n_trials, chunk_size=50000):
+    """sensitivity_analysis.py method='tensor': the K x phi grid in one array pass"""
+    time = np.arange(0, T, dt)
+    points = [(K, phi) for K in (3.0, 5.0, 7.0) for phi in (0.2, 0.3, 0.4)]
+    run_grid(DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5)), CSMC(r=1.0),
+             Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True),
+             time, dt, trial_seeds(2024, 1, n_trials)[0],
+             {'K': [K for K, _ in points], 'phi': [phi for _, phi in points]},
+             metrics={'success': Success()}, d_at_next=True, chunk_size=chunk_size)
+    return len(points) * n_trials, len(time)
+
+
+def bench_filter(T, n_particles=10000):
+    """state_estimation.py: one subject controlled through the particle filter"""
+    time = np.arange(0, T, dt)
+    estimator = ParticleFilter(a=2.0, b=1.0, sigma=0.6, dt=dt, noise=0.3, n_particles=n_particles)
+    run(DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5)),
+        Filtered(CSMC(K=5.0, phi=0.3, r=1.0), estimator, seed=1),
+        Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True), time, dt,
+        seeds=[0], metrics={'compliance': Compliance()}, d_at_next=True)
+    return 1, len(time)
+
+
+numpy_only = {'sensitivity_tensor', 'particle_filter'}
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+def measure(name, backend, work, repeat=1):
+    """
+    Time work() (best of `repeat`), then run it once more under tracemalloc.
+
+    Returns:
+        dict with seconds, steps_per_sec, trials_per_sec and peak_mb
+    """
+    best = np.inf
+    for _ in range(repeat):
+        csmc.clear_cache()
+        t0 = timer.perf_counter()
+        n_trials, n_steps = work()
+        best = min(best, timer.perf_counter() - t0)
+
+    # Memory pass kept separate: tracing allocations slows the NumPy loop
+    csmc.clear_cache()
+    tracemalloc.start()
+    work()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    transitions = n_trials * (n_steps - 1)
+    return {
+        'name': name,
+        'backend': backend,
+        'trials': n_trials,
+        'steps': n_steps,
+        'seconds': best,
+        'steps_per_sec': transitions / best,
+        'trials_per_sec': n_trials / best,
+        'peak_mb': peak / 2**20,
+    }
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'numba': csmc.HAVE_NUMBA,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'code_version': csmc.code_version(),
+    }
+
+
+def compare(results, reference, tolerance):
+    """Print speed ratios against a reference run; return the regressed cases"""
+    old = {(r['name'], r['backend']): r for r in reference['results']}
+    regressions = []
+    print(f"\n{'Case':<18} {'Backend':<8} {'Before':>12} {'After':>12} {'Ratio':>7}")
+    print("-" * 62)
+    for r in results:
+        prev = old.get((r['name'], r['backend']))
+        if prev is None:
+            continue
+        ratio = r['steps_per_sec'] / prev['steps_per_sec']
+        flag = ''
+        if ratio < 1 - tolerance:
+            flag = '  ✗ slower'
+            regressions.append(r)
+        print(f"{r['name']:<18} {r['backend']:<8} {prev['steps_per_sec']:>12.3g} "
+              f"{r['steps_per_sec']:>12.3g} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--quick', action='store_true',
+                        help='3 min horizon and 20 trials per point')
+    parser.add_argument('--backend', choices=backends, action='append',
+                        help='backend(s) to run (default: both)')
+    parser.add_argument('--cases', nargs='+',
+                        help='subset of cases (step_ou, appendix_mc, ...)')
+    parser.add_argument('--repeat', type=int, default=1, help='timed repetitions (best of)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='sweep processes for sensitivity_grid (1 = serial)')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    T = 180.0 if args.quick else 1800.0
+    n_trials = 20 if args.quick else 100
+
+    cases = {
+        'step_ou': lambda b: bench_step(OU(theta=0.1, mu=1.0, sigma=0.05), T, b),
+        'step_ddm': lambda b: bench_step(DDM(v_drift=0.05, sigma=0.05), T, b),
+        'step_dw': lambda b: bench_step(DoubleWell(a=2.0, b=1.0, sigma=0.05), T, b),
+        'appendix_mc': lambda b: bench_appendix(T, n_trials, b),
+        'baseline_4ctrl': lambda b: bench_baseline(T, n_trials, b),
+        'sensitivity_grid': lambda b: bench_grid(T, n_trials, b, args.workers),
+        'sensitivity_tensor': lambda b: bench_tensor(T, n_trials),
+        'particle_filter': lambda b: bench_filter(T),
+    }
+    selected = args.cases or list(cases)
+    unknown = set(selected) - set(cases)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    print("=" * 70)
+    print(f"Simulation Benchmark (T={T:.0f}s, dt={dt}, trials={n_trials}, "
+          f"Numba={'yes' if csmc.HAVE_NUMBA else 'no'})")
+    print("=" * 70)
+
+    if csmc.HAVE_NUMBA and 'jit' in (args.backend or backends):
+        bench_step(DoubleWell(), 1.0, 'jit')  # Compile (or load) the kernel outside the timings
+
+    results = []
+    print(f"{'Case':<18} {'Backend':<8} {'Time [s]':>9} {'Steps/s':>12} "
+          f"{'Trials/s':>10} {'Peak MB':>9}")
+    print("-" * 70)
+    for name in selected:
+        for backend in args.backend or backends:
+            if name in numpy_only and backend != 'numpy':
+                continue
+            r = measure(name, backend, functools.partial(cases[name], backend), args.repeat)
+            results.append(r)
+            print(f"{name:<18} {backend:<8} {r['seconds']:>9.3f} {r['steps_per_sec']:>12.3g} "
+                  f"{r['trials_per_sec']:>10.3g} {r['peak_mb']:>9.1f}")
+
+    report = {'environment': environment(), 'T': T, 'dt': dt, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)
+        regressions = compare(results, reference, args.tolerance)
+        if regressions:
+            print(f"\n✗ FAIL: {len(regressions)} case(s) slower than "
+                  f"{(1 - args.tolerance) * 100:.0f}% of the reference")
+            sys.exit(1)
+        print("\n✓ PASS: No regression beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Integrator Convergence Study
+
+Compares Euler-Maruyama with the SRA1 stochastic Runge-Kutta scheme and the
+adaptive SRA1 solver (csmc.integrators) on two closed loops:
+
+- Double-well + C-SMC (appendix model of verify_appendix_code.py)
+- OU + C-SMC (Phase 4 of run_ou_all.py)
+
+All fixed-step solutions are driven by the same Brownian paths, coarsened
+exactly from a reference resolution, so the strong error is measured
+pathwise against a fine SRA1 reference.  The weak error is the error of the
+mean compliance (time in the 0.8-1.2 band).  The adaptive solver draws its
+own path, so its compliance error also contains Monte Carlo noise.
+
+Outputs:
+- Error / order table per model
+- convergence_study.png: strong and weak error vs number of steps
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from csmc import DoubleWell, OU, CSMC, Disturbance
+from csmc.integrators import (closed_loop, brownian_increments, coarsen, solve_fixed,
+                              solve_adaptive, time_in_band)
+
+T = 1800.0           # 30 min session
+h_ref = 0.005        # Reference resolution
+factors = [20, 16, 10, 8, 4, 2]   # h = 0.1 ... 0.01
+methods = ['euler', 'sra1']
+tolerances = [0.1, 0.03, 0.01, 0.003]
+n_trials = 100
+chunk = 50           # Trials integrated together (memory: 2 x steps x chunk)
+pulse = (720.0, 840.0)
+
+models = {
+    'Double-Well': dict(
+        plant=DoubleWell(a=1.0, b=1.0, sigma=0.1),
+        controller=CSMC(K=5.0, phi=0.3, r=1.0),
+        disturbance=Disturbance(amplitude=0.5, period=150, pulse=-2.5),
+        x0=0.9),
+    'OU': dict(
+        plant=OU(theta=1.0, mu=1.0, sigma=0.05),
+        controller=CSMC(K=5.0, phi=0.3, r=1.0),
+        disturbance=Disturbance(amplitude=0.5, period=150, pulse=-4.0),
+        x0=1.0),
+}
+
+
+def study(model):
+    """Strong / weak errors of every method and step, plus adaptive runs"""
+    F = closed_loop(model['plant'], model['controller'], model['disturbance'])
+    sigma, x0 = model['plant'].sigma, model['x0']
+    n_ref = int(round(T / h_ref))
+
+    sq_err = {(m, f): 0.0 for m in methods for f in factors}
+    comp = {(m, f): [] for m in methods for f in factors}
+    comp_ref = []
+    for lo in range(0, n_trials, chunk):
+        seeds = range(lo, min(lo + chunk, n_trials))
+        dW, I10 = brownian_increments(seeds, n_ref, h_ref)
+        x_ref = solve_fixed(F, sigma, x0, 0.0, h_ref, dW, I10, 'sra1')
+        t_ref = h_ref * np.arange(n_ref + 1)
+        comp_ref.append(np.array([time_in_band(t_ref, x_ref[:, j]) for j in range(x_ref.shape[1])]))
+        for f in factors:
+            h = f * h_ref
+            cW, cI = coarsen(dW, I10, h_ref, f)
+            t_h = h * np.arange(len(cW) + 1)
+            for m in methods:
+                x = solve_fixed(F, sigma, x0, 0.0, h, cW, cI, m)
+                sq_err[m, f] += np.sum((x - x_ref[::f]) ** 2) / len(x)
+                comp[m, f].append([time_in_band(t_h, x[:, j]) for j in range(x.shape[1])])
+
+    comp_ref = np.concatenate(comp_ref)
+    rows = []
+    for m in methods:
+        for f in factors:
+            c = np.concatenate(comp[m, f])
+            rows.append(dict(method=m, h=f * h_ref, steps=int(round(T / (f * h_ref))),
+                             strong=np.sqrt(sq_err[m, f] / n_trials),
+                             weak=abs(np.mean(c) - np.mean(comp_ref))))
+
+    for tol in tolerances:
+        times, x, stats = solve_adaptive(F, sigma, x0, 0.0, T, n_trials, seed=12345, tol=tol,
+                                         tstops=pulse)
+        c = np.array([time_in_band(times, x[:, j]) for j in range(n_trials)])
+        rows.append(dict(method='adaptive', h=tol, steps=stats['accepted'],
+                         rejected=stats['rejected'], strong=np.nan,
+                         weak=abs(np.mean(c) - np.mean(comp_ref)),
+                         mc_se=np.std(c, ddof=1) / np.sqrt(n_trials)))
+    return rows, np.mean(comp_ref)
+
+
+def order(rows, method, key):
+    """Least-squares slope of log(error) vs log(h)"""
+    sel = [r for r in rows if r['method'] == method and r[key] > 0]
+    h = np.log([r['h'] for r in sel])
+    e = np.log([r[key] for r in sel])
+    return np.polyfit(h, e, 1)[0]
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Integrator Convergence Study")
+    print("=" * 70)
+    print(f"T={T:.0f}s, reference: SRA1 at h={h_ref}, trials={n_trials}")
+
+    fig, axes = plt.subplots(len(models), 2, figsize=(12, 5 * len(models)))
+    for row_axes, (name, model) in zip(axes, models.items()):
+        print(f"\n[{name}]")
+        rows, comp_ref = study(model)
+        print(f"Reference compliance: {comp_ref:.3f}%")
+        print(f"{'Method':<10} {'h / tol':>8} {'Steps':>8} {'Strong err':>12} {'Weak err [%]':>13}")
+        print("-" * 55)
+        for r in rows:
+            extra = f"  ({r['rejected']} rejected, MC s.e. {r['mc_se']:.3f})" if r['method'] == 'adaptive' else ''
+            print(f"{r['method']:<10} {r['h']:>8.3g} {r['steps']:>8d} {r['strong']:>12.3e} "
+                  f"{r['weak']:>13.4f}{extra}")
+        for m in methods:
+            print(f"{m}: strong order {order(rows, m, 'strong'):.2f}, "
+                  f"weak order {order(rows, m, 'weak'):.2f}")
+
+        # Steps needed by SRA1 for the compliance accuracy of Euler at dt = 0.01
+        target = next(r['weak'] for r in rows if r['method'] == 'euler' and np.isclose(r['h'], 0.01))
+        fit = [r for r in rows if r['method'] == 'sra1' and r['weak'] <= target]
+        if fit:
+            best = min(fit, key=lambda r: r['steps'])
+            print(f"SRA1 matches Euler(dt=0.01) compliance error {target:.4f}% with "
+                  f"{best['steps']} steps (h={best['h']:.3g}, {int(T / 0.01) / best['steps']:.1f}x fewer)")
+
+        for ax, key, label in zip(row_axes, ['strong', 'weak'],
+                                  ['RMS strong error', 'Compliance error [%]']):
+            for m, marker in zip(methods + ['adaptive'], ['o', 's', '^']):
+                sel = [r for r in rows if r['method'] == m and np.isfinite(r[key])]
+                if sel:
+                    ax.loglog([r['steps'] for r in sel], [max(r[key], 1e-6) for r in sel],
+                              marker=marker, label=m)
+            ax.set_xlabel('Number of steps')
+            ax.set_ylabel(label)
+            ax.set_title(f'{name}: {label}')
+            ax.grid(True, which='both', alpha=0.3)
+            ax.legend()
+
+    plt.tight_layout()
+    plt.savefig('convergence_study.png', dpi=150)
+    print("\nFigure saved: convergence_study.png")
@@ -0,0 +1,33 @@
+"""
+C-SMC simulation core.
+
+Pluggable plants, controllers, disturbances and metrics on top of one
+batch Euler-Maruyama stepping kernel.
+"""
+
+from .engine import simulate_batch, noise_blocks, run, Antithetic
+from .plants import Plant, DDM, OU, DoubleWell
+from .controllers import Controller, NoControl, PID, RuleBased, CSMC
+from .disturbances import Disturbance
+from .metrics import (Metric, Compliance, Success, MeanAbsError, Chattering, TimeToRecovery,
+                      Interventions)
+from .jit import HAVE_NUMBA, simulate_jit
+from .sweep import run_sweep, trial_seeds
+from .grid import run_grid
+from .streams import RandomStreams, Substream
+from .refine import refine_grid, boundary_surface
+from .shared import disturbance_array, noise_matrix, cache_info, clear_cache, set_cache_size
+from .store import TrajectoryStore, TraceWriter, describe, record_ensemble
+from .cache import ResultCache, run_key, code_version
+from .integrators import closed_loop, solve_fixed, solve_adaptive, BrownianPath
+from .exact import sample_exact, mean_path
+from .fokker_planck import solve_fokker_planck
+from .rare import ams, collapse_probability
+from .sequential import wilson_interval, run_sequential
+from .variance import antithetic, ou_control, estimate, difference
+from .estimation import fit_double_well, fit_euler, fit_exact
+from .cohort import find_recordings, fit_cohort
+from .realtime import ControlService, LowPass, replay
+from .sessions import replay_sessions
+from .filters import EKF, ParticleFilter, Filtered
+from .delay import DelayLine, GammaDelay
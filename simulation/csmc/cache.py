@@ -0,0 +1,141 @@
+"""
+Content-Addressed Result Cache
+
+Stores the results of run() on disk under a hash of everything that
+determines them: plant, controller, disturbance, metric settings, time grid
+(dt, T), initial state, seeds, backend and the source of this package (code
+version).  A repeated run with the same inputs loads the stored metrics and
+trajectories instead of simulating again, so re-plotting after a figure
+tweak is immediate.  Any change to the models or the engine changes the
+code version and so misses.
+
+Entries are .npz files; once the directory exceeds max_bytes the least
+recently used entries are deleted.  Unseeded runs are never cached.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .shared import seeds_key
+from .store import describe, _json_default
+
+CACHE_DIR = os.environ.get('CSMC_CACHE_DIR', '.csmc_cache')
+
+_code_version = None
+
+
+def code_version():
+    """Hash of the csmc source files (changes whenever the package does)"""
+    global _code_version
+    if _code_version is None:
+        package = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for name in sorted(os.listdir(package)):
+            if name.endswith('.py'):
+                with open(os.path.join(package, name), 'rb') as f:
+                    h.update(name.encode() + b'\0' + f.read())
+        _code_version = h.hexdigest()
+    return _code_version
+
+
+def run_key(plant, controller, disturbance, time, dt, seeds, x0=1.0, metrics=None,
+            d_at_next=False, record=False, backend='numpy', **extra):
+    """
+    Hex digest identifying one run() configuration.
+
+    extra: further JSON-serializable inputs that change the results
+    (e.g. trace dtype of a stored ensemble).
+    """
+    time = np.asarray(time, dtype=float)
+    parts = dict(
+        plant=describe(plant),
+        controller=describe(controller),
+        disturbance=describe(disturbance),
+        metrics={name: describe(m) for name, m in (metrics or {}).items()},
+        time=[float(time[0]), float(time[-1]), len(time),
+              hashlib.sha1(np.ascontiguousarray(time).tobytes()).hexdigest()],
+        dt=dt,
+        seeds=seeds_key(seeds),
+        x0=x0,
+        d_at_next=d_at_next,
+        record=record,
+        backend=backend,
+        version=code_version(),
+        **extra,
+    )
+    blob = json.dumps(parts, sort_keys=True, default=_json_default)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Directory of result dicts keyed by run_key(), bounded in bytes (LRU).
+
+    Args:
+        path: cache directory (default: $CSMC_CACHE_DIR or ./.csmc_cache)
+        max_bytes: total size above which old entries are evicted
+    """
+
+    def __init__(self, path=None, max_bytes=2 << 30):
+        self.path = path or CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.npz')
+
+    def get(self, key):
+        """Stored results for key, or None"""
+        path = self._file(key)
+        try:
+            with np.load(path) as data:
+                results = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # Mark as recently used
+        self.hits += 1
+        return results
+
+    def put(self, key, results):
+        """Store a dict of arrays, then evict down to max_bytes"""
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **{name: np.asarray(v) for name, v in results.items()})
+        os.replace(tmp, self._file(key))
+        self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first"""
+        out = []
+        for name in os.listdir(self.path):
+            if name.endswith('.npz'):
+                path = os.path.join(self.path, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                out.append((st.st_mtime, st.st_size, path))
+        return sorted(out)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
@@ -0,0 +1,228 @@
+"""
+Cohort Fitting of Physiological Recordings
+
+Reads per-subject inter-beat-interval (IBI) recordings, maps them to the
+cognitive-state proxy x(t) and fits the double-well parameters of every
+subject in parallel.
+
+Supported files:
+- Empatica E4 IBI.csv (PhysioNet wearable exam stress dataset): first
+  line "<start timestamp>, IBI", then "<offset [s]>, <ibi [s]>" per beat
+- CSV with a header: an IBI / RR column (seconds, or milliseconds if the
+  values exceed 10) and optionally a time column; beat times are the
+  cumulative IBIs when there is none
+- Parquet with the same columns (needs pyarrow)
+
+Proxy: the RMSSD of the beats in a sliding window, sampled every dt and
+normalized by the subject's median, x = 2 * RMSSD / median - 1 (1 = the
+subject's typical variability, -1 = none).  Windows with fewer than three
+beats are NaN; the estimators skip the transitions that touch them.
+
+Each file is read, converted and fitted inside one worker process, so
+only the recordings in flight are held in memory.
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+
+import numpy as np
+
+from .estimation import fit_double_well
+
+try:
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+IBI_COLUMNS = ('ibi', 'rr', 'ibi_s', 'ibi_ms', 'rr_ms', 'nn')
+TIME_COLUMNS = ('time', 't', 'timestamp', 'offset', 'seconds')
+
+TABLE_COLUMNS = ('subject', 'file', 'n_beats', 'duration', 'n_samples',
+                 'a', 'a_se', 'b', 'b_se', 'sigma', 'sigma_se', 'loglik', 'method', 'error')
+
+
+def _columns(names):
+    """Map lower-cased column names to (time, ibi) indices (time may be None)"""
+    lower = [str(name).strip().lower() for name in names]
+    ibi = next((lower.index(c) for c in IBI_COLUMNS if c in lower), None)
+    time = next((lower.index(c) for c in TIME_COLUMNS if c in lower), None)
+    if ibi is None:
+        raise ValueError(f"No IBI column (one of {IBI_COLUMNS}) among {list(names)}")
+    return time, ibi
+
+
+def _beats(times, ibi):
+    """Beat times and IBIs in seconds (milliseconds are detected and converted)"""
+    ibi = np.asarray(ibi, dtype=float)
+    if np.nanmedian(ibi) > 10:
+        ibi = ibi / 1000
+    if times is None:
+        times = np.cumsum(ibi)
+    return np.asarray(times, dtype=float), ibi
+
+
+def read_ibi(path):
+    """
+    Read one IBI recording.
+
+    Returns:
+        times: beat times [s] from the start of the recording
+        ibi: inter-beat intervals [s]
+    """
+    if path.endswith('.parquet'):
+        if not HAVE_PYARROW:
+            raise ImportError("Reading Parquet files needs pyarrow (pip install pyarrow)")
+        table = pq.read_table(path)
+        time, ibi = _columns(table.column_names)
+        values = table.column(ibi).to_numpy()
+        times = None if time is None else table.column(time).to_numpy()
+        return _beats(times, values)
+
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    if not rows:
+        raise ValueError("Empty file")
+    header = [cell.strip() for cell in rows[0]]
+    if len(header) >= 2 and header[1].upper() == 'IBI':
+        # Empatica E4: start timestamp, then (offset, ibi) per beat
+        data = np.array(rows[1:], dtype=float).reshape(-1, 2)
+        return _beats(data[:, 0], data[:, 1])
+    try:
+        float(header[0])
+        data = np.array(rows, dtype=float)  # No header: (ibi) or (time, ibi)
+        time, ibi = (None, 0) if data.ndim == 1 or data.shape[1] == 1 else (0, 1)
+    except ValueError:
+        time, ibi = _columns(header)
+        data = np.array(rows[1:], dtype=float)
+    data = data.reshape(len(data), -1)
+    return _beats(None if time is None else data[:, time], data[:, ibi])
+
+
+def state_proxy(times, ibi, dt=1.0, window=60.0, ibi_range=(0.3, 2.0)):
+    """
+    Cognitive-state proxy x(t) = 2 * RMSSD(t) / median RMSSD - 1.
+
+    Args:
+        times, ibi: beat times and intervals [s]
+        dt: sampling interval of x [s]
+        window: RMSSD window centred on each sample [s]
+        ibi_range: physiologically plausible IBIs; others are dropped
+            together with the successive differences they enter
+
+    Returns:
+        t: sample times [s]
+        x: proxy (NaN where the window holds fewer than three beats)
+    """
+    times = np.asarray(times, dtype=float)
+    ibi = np.asarray(ibi, dtype=float)
+    ok = (ibi >= ibi_range[0]) & (ibi <= ibi_range[1])
+    sq = np.diff(ibi) ** 2
+    valid = ok[1:] & ok[:-1]
+    sq = np.where(valid, sq, 0.0)
+    beat_t = times[1:]
+
+    # Windowed sums of the squared successive differences via cumulative sums
+    cum_sq = np.concatenate([[0.0], np.cumsum(sq)])
+    cum_n = np.concatenate([[0], np.cumsum(valid)])
+    t = np.arange(times[0], times[-1] + dt / 2, dt)
+    lo = np.searchsorted(beat_t, t - window / 2)
+    hi = np.searchsorted(beat_t, t + window / 2)
+    n = cum_n[hi] - cum_n[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rmssd = np.where(n >= 2, np.sqrt((cum_sq[hi] - cum_sq[lo]) / n), np.nan)
+    median = np.nanmedian(rmssd) if np.any(np.isfinite(rmssd)) else np.nan
+    if not median > 0:
+        raise ValueError("No window with enough valid beats")
+    return t - t[0], 2 * rmssd / median - 1
+
+
+def find_recordings(root, pattern='IBI.csv'):
+    """
+    Recording files under root matching pattern (e.g. 'IBI.csv', '*.parquet').
+
+    Returns:
+        list of (subject, path); subject is the directory of the file
+        relative to root (the file stem for files directly in root)
+    """
+    found = []
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if fnmatch(name, pattern):
+                path = os.path.join(directory, name)
+                rel = os.path.relpath(directory, root)
+                subject = os.path.splitext(name)[0] if rel == '.' else rel.replace(os.sep, '/')
+                found.append((subject, path))
+    return sorted(found)
+
+
+def fit_recording(subject, path, dt=1.0, window=60.0, method='exact', **fit_kwargs):
+    """
+    Read, convert and fit one recording (one row of the parameter table).
+
+    Errors of this recording (unreadable file, too few beats, degenerate
+    fit) are reported in the 'error' field instead of stopping the cohort.
+    """
+    row = dict.fromkeys(TABLE_COLUMNS, '')
+    row.update(subject=subject, file=path, method=method)
+    try:
+        times, ibi = read_ibi(path)
+        t, x = state_proxy(times, ibi, dt=dt, window=window)
+        fit = fit_double_well(x, dt, method=method, **fit_kwargs)
+    except (OSError, ValueError, ImportError) as exc:
+        row['error'] = f"{type(exc).__name__}: {exc}"
+        return row
+    row.update(n_beats=len(ibi), duration=float(times[-1] - times[0]), n_samples=len(t),
+               a=fit['a'], a_se=fit['se']['a'], b=fit['b'], b_se=fit['se']['b'],
+               sigma=fit['sigma'], sigma_se=fit['se']['sigma'], loglik=fit['loglik'])
+    return row
+
+
+def _fit_job(args):
+    subject, path, kwargs = args
+    return fit_recording(subject, path, **kwargs)
+
+
+def fit_cohort(recordings, output=None, n_workers=None, verbose=False, **kwargs):
+    """
+    Fit every recording in parallel and collect the parameter table.
+
+    Args:
+        recordings: list of (subject, path) (see find_recordings)
+        output: CSV path of the table (each row written as soon as it is in)
+        n_workers: worker processes (default: os.cpu_count(); 1 = in this process)
+        verbose: print one line per finished recording
+        **kwargs: forwarded to fit_recording (dt, window, method, ...)
+
+    Returns:
+        rows: list of dicts with TABLE_COLUMNS, in the order of recordings
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    jobs = [(subject, path, kwargs) for subject, path in recordings]
+    rows = [None] * len(jobs)
+
+    f = open(output, 'w', newline='') if output else None
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        writer = None
+        if f is not None:
+            writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS)
+            writer.writeheader()
+        results = map(_fit_job, jobs) if executor is None else executor.map(_fit_job, jobs)
+        for i, row in enumerate(results):
+            rows[i] = row
+            if writer is not None:
+                writer.writerow(row)
+                f.flush()
+            if verbose:
+                status = row['error'] or (f"a={row['a']:.3f}, b={row['b']:.3f}, "
+                                          f"sigma={row['sigma']:.3f}")
+                print(f"  [{i + 1}/{len(jobs)}] {row['subject']}: {status}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if f is not None:
+            f.close()
+    return rows
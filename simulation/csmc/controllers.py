@@ -0,0 +1,148 @@
+"""
+Controllers
+
+Vectorized control laws u = controller(x) acting on the state of all
+trials at once.  reset(n_trials) clears any internal state before a run.
+A controller with delay > 0 sees the state measured `delay` steps ago;
+the delay may also be per trial (an array), fractional, or distributed
+(delay.GammaDelay).
+
+Multi-rate: the plant steps at dt, while the sensor samples every
+`sample_every` steps and the controller updates every `every` steps, each
+holding its last value in between (zero-order hold); at_rates() sets both
+clocks and the sensor latency in seconds.
+"""
+
+import numpy as np
+
+
+def _steps(period, dt):
+    """Whole plant steps in period [s]"""
+    return int(round(period / dt))
+
+
+class Controller:
+    """Base class: subclasses implement __call__(x)"""
+
+    every = 1         # Plant steps per controller update
+    sample_every = 1  # Plant steps per sensor sample
+
+    def __init__(self, delay=0):
+        self.delay = delay  # Sensor delay in steps
+
+    def at_rates(self, dt, control=None, sample=None, latency=None):
+        """
+        Run the controller and its sensor on their own clocks.
+
+        Args:
+            dt: plant time step
+            control: controller period [s]; u is held between updates
+            sample: sensor period [s]; the last sample is held
+            latency: age of each sample when it is taken [s] (sets delay)
+
+        Returns:
+            self
+        """
+        if control is not None:
+            self.every = max(1, _steps(control, dt))
+        if sample is not None:
+            self.sample_every = max(1, _steps(sample, dt))
+        if latency is not None:
+            self.delay = _steps(latency, dt)
+        return self
+
+    def reset(self, n_trials):
+        pass
+
+    def __call__(self, x):
+        raise NotImplementedError
+
+
+class NoControl(Controller):
+    """Open loop: u = 0"""
+
+    def __call__(self, x):
+        return 0.0
+
+
+class PID(Controller):
+    """
+    Simple PID controller with output saturation.
+
+    dt is the plant time step; with a multi-rate schedule the integral and
+    derivative use the controller period every * dt.
+    """
+
+    def __init__(self, Kp=3.0, Ki=0.1, Kd=0.5, r=1.0, dt=0.01, u_limit=10.0, delay=0):
+        super().__init__(delay)
+        self.Kp = Kp
+        self.Ki = Ki
+        self.Kd = Kd
+        self.r = r
+        self.dt = dt
+        self.u_limit = u_limit
+        self.reset(1)
+
+    def reset(self, n_trials):
+        self.integral = 0.0
+        self.prev_error = 0.0
+
+    def __call__(self, x):
+        h = self.dt * self.every
+        error = self.r - x
+        self.integral = self.integral + error * h
+        derivative = (error - self.prev_error) / h
+        self.prev_error = error
+        u = self.Kp * error + self.Ki * self.integral + self.Kd * derivative
+        return np.clip(u, -self.u_limit, self.u_limit)
+
+
+class RuleBased(Controller):
+    """
+    Threshold-based intervention.
+
+    Args:
+        rules: (threshold, u) pairs in ascending threshold order; the first
+               rule with x < threshold applies, otherwise u = 0
+    """
+
+    def __init__(self, rules=((0.5, 5.0), (0.8, 2.0)), delay=0):
+        super().__init__(delay)
+        self.rules = rules
+
+    def __call__(self, x):
+        u = 0.0
+        for threshold, level in reversed(self.rules):
+            u = np.where(x < threshold, level, u)
+        return u
+
+
+class CSMC(Controller):
+    """
+    Cognitive Sliding Mode Control: u = -K * tanh((x - r) / phi)
+
+    phi = 0 degenerates to the discontinuous law u = -K * sign(x - r).
+
+    Args:
+        K: control gain
+        phi: boundary layer width (cognitive flexibility)
+        r: target recall level
+    """
+
+    def __init__(self, K=5.0, phi=0.3, r=1.0, delay=0):
+        super().__init__(delay)
+        self.K = K
+        self.phi = phi
+        self.r = r
+
+    def __call__(self, x):
+        s = x - self.r
+        if np.ndim(self.phi):
+            # One boundary layer per trial (parameter grids)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                smooth = np.tanh(s / self.phi)
+            return -self.K * np.where(self.phi > 0, smooth, np.sign(s))
+        if self.phi > 0:
+            return -self.K * np.tanh(s / self.phi)
+        return -self.K * np.sign(s)
+
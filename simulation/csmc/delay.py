@@ -0,0 +1,131 @@
+"""
+Delay Lines
+
+Fixed-memory circular buffers of the recent states of all trials, for
+sensor delays other than one whole number of steps shared by every trial:
+
+- per-trial delays: an array with one delay [steps] per trial
+- fractional delays: linear interpolation between neighbouring steps
+- distributed delays (GammaDelay): the measurement is a gamma-weighted
+  average of the past states
+
+The buffer holds (longest lag + 1) rows whatever the horizon, so delay
+sweeps (e.g. run_grid over 'delay') run in constant memory.  As in the
+engine's integer delay, the sensor reports the current state until the
+delayed sample exists (t <= delay); the gamma kernel reads the initial
+state for lags before t = 0.
+"""
+
+import math
+
+import numpy as np
+from scipy.special import gammainc, gammaincinv
+
+
+def fixed_delay(delay):
+    """The delay as a whole number of steps shared by all trials, else None"""
+    if isinstance(delay, GammaDelay) or np.ndim(delay) > 0:
+        return None
+    if float(delay) != int(delay):
+        return None
+    return int(delay)
+
+
+class GammaDelay:
+    """
+    Distributed delay: gamma kernel over the past steps.
+
+    Args:
+        mean: mean delay [steps] (scalar or one per trial)
+        shape: gamma shape k (1 = exponentially fading memory; a large k
+            approaches a fixed delay of `mean` steps)
+        tail: kernel mass dropped beyond the longest lag kept
+    """
+
+    def __init__(self, mean, shape=4.0, tail=1e-6):
+        self.mean = mean
+        self.shape = shape
+        self.tail = tail
+
+    def max_lag(self):
+        scale = np.max(self.mean) / self.shape
+        return int(math.ceil(gammaincinv(self.shape, 1 - self.tail) * scale))
+
+    def weights(self):
+        """Weight of lag k = 0..max_lag (rows) per trial (columns), each column summing to 1"""
+        edges = np.concatenate([[0.0], np.arange(self.max_lag() + 1) + 0.5])
+        scale = np.reshape(self.mean, (1, -1)) / self.shape
+        cdf = gammainc(self.shape, edges[:, None] / scale)
+        w = np.diff(cdf, axis=0)
+        return w / w.sum(axis=0)
+
+    def __eq__(self, other):
+        return (isinstance(other, GammaDelay) and np.array_equal(self.mean, other.mean)
+                and self.shape == other.shape and self.tail == other.tail)
+
+    def __repr__(self):
+        return f"GammaDelay(mean={self.mean!r}, shape={self.shape!r})"
+
+
+class DelayLine:
+    """
+    Circular buffer of the last states of every trial.
+
+    Args:
+        delay: lag [steps] (scalar or per trial, possibly fractional) or
+            GammaDelay
+        x0: initial state (scalar or per trial), also the history before t = 0
+        n_trials: number of trials
+
+    push(x) appends the state of the current step; read() returns what the
+    sensor reports at that step.
+    """
+
+    def __init__(self, delay, x0, n_trials):
+        self.delay = delay
+        if isinstance(delay, GammaDelay):
+            self.kernel = delay.weights()
+            max_lag = len(self.kernel) - 1
+            # Reversed kernel twice over: the weights of the buffer rows for
+            # any head position are one slice of it, without a gather
+            self.wrapped = np.concatenate([self.kernel[::-1], self.kernel[::-1]])
+        else:
+            self.kernel = None
+            self.lag = np.asarray(delay, dtype=float)
+            if np.any(self.lag < 0):
+                raise ValueError("Delays must be non-negative")
+            max_lag = int(math.ceil(self.lag.max())) if self.lag.size else 0
+        self.size = max_lag + 1
+        self.buf = np.empty((self.size, n_trials))
+        self.buf[:] = x0
+        self.head = -1  # Row of the newest state
+        self.t = -1     # Step of the newest state
+        self.cols = np.arange(n_trials)
+
+    def push(self, x):
+        self.head = (self.head + 1) % self.size
+        self.buf[self.head] = x
+        self.t += 1
+
+    def at(self, lag):
+        """State lag steps back (per trial, linearly interpolated)"""
+        lo = np.floor(lag)
+        frac = lag - lo
+        i0 = (self.head - lo.astype(np.int64)) % self.size
+        i1 = (i0 - 1) % self.size
+        if np.ndim(lag) == 0:
+            newer, older = self.buf[i0], self.buf[i1]
+        else:
+            newer, older = self.buf[i0, self.cols], self.buf[i1, self.cols]
+        return newer + frac * (older - newer) if np.any(frac) else newer.copy()
+
+    def read(self):
+        if self.kernel is not None:
+            offset = (self.size - 1 - self.head) % self.size
+            w = self.wrapped[offset:offset + self.size]
+            if w.shape[1] == 1:
+                return w[:, 0] @ self.buf
+            return np.einsum('ij,ij->j', w, self.buf)
+        # Current state until the delayed sample exists
+        lag = np.where(self.t > self.lag, self.lag, 0.0)
+        return self.at(lag)
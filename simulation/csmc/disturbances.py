@@ -0,0 +1,51 @@
+"""
+Disturbances
+
+The "hell negotiation" stress profile shared by all experiments: a slow
+sine wave (steady tension) plus a rectangular panic pulse.
+"""
+
+import numpy as np
+
+
+class Disturbance:
+    """
+    d(t) = scale * (amplitude * sin(2 pi t / period) + pulse * [start <= t <= end])
+
+    Args:
+        amplitude: steady-state wave amplitude
+        period: wave period [s]
+        pulse: panic pulse magnitude (negative = pushes recall down)
+        pulse_start, pulse_end: panic window [s] (default 12-14 min)
+        replace_wave: the pulse replaces the wave inside the window
+                      instead of adding to it
+        scale: overall input gain (e.g. 1/tau for low sensitivity)
+    """
+
+    def __init__(self, amplitude=0.5, period=150.0, pulse=-2.5,
+                 pulse_start=720.0, pulse_end=840.0, replace_wave=False, scale=1.0):
+        self.amplitude = amplitude
+        self.period = period
+        self.pulse = pulse
+        self.pulse_start = pulse_start
+        self.pulse_end = pulse_end
+        self.replace_wave = replace_wave
+        self.scale = scale
+
+    def key(self):
+        """Hashable description, used to share precomputed d(t) arrays"""
+        return (type(self).__name__, self.amplitude, self.period, self.pulse,
+                self.pulse_start, self.pulse_end, self.replace_wave, self.scale)
+
+    def sample(self, t):
+        """Evaluate d(t) on a time array"""
+        t = np.asarray(t, dtype=float)
+        d = self.amplitude * np.sin(2 * np.pi * (1 / self.period) * t)
+        panic = (t >= self.pulse_start) & (t <= self.pulse_end)
+        if self.replace_wave:
+            d = np.where(panic, self.pulse, d)
+        else:
+            d = d + np.where(panic, self.pulse, 0.0)
+        if self.scale != 1.0:
+            d = self.scale * d
+        return d
@@ -0,0 +1,332 @@
+"""
+Batch Euler-Maruyama Engine
+
+Advances every Monte Carlo trial at once as a NumPy array of shape
+(n_trials,), one timestep at a time:
+
+    x[k+1] = x[k] + (f(x[k]) + u[k] + d[k]) * dt + sigma * sqrt(dt) * z[k]
+
+The disturbance d is precomputed once and shared by all trials.  Gaussian
+increments z are drawn in blocks from one np.random.RandomState per trial,
+so trial i consumes exactly the same random numbers as the legacy scalar
+loop after np.random.seed(seeds[i]).
+"""
+
+import numpy as np
+
+from .delay import DelayLine, fixed_delay
+from .streams import Substream
+
+NOISE_BLOCK = 4096  # Timesteps of noise drawn per block (memory: block x n_trials)
+
+
+class Antithetic:
+    """
+    Seed of the mirrored stream -z of another seed (antithetic variates).
+
+    Accepted wherever a seed is: the trial sees exactly the negated
+    increments of the trial seeded with `seed`.
+    """
+
+    def __init__(self, seed):
+        if seed is None:
+            raise ValueError("An antithetic stream needs an explicit seed")
+        self.seed = seed
+
+    def __eq__(self, other):
+        return isinstance(other, Antithetic) and np.array_equal(self.seed, other.seed)
+
+    def __hash__(self):
+        return hash(('antithetic', np.asarray(self.seed).tobytes()))
+
+    def __repr__(self):
+        return f"Antithetic({self.seed!r})"
+
+
+class _MirroredState:
+    """RandomState whose normal draws are negated"""
+
+    def __init__(self, seed):
+        self.rs = random_state(seed)
+
+    def standard_normal(self, size=None):
+        return -self.rs.standard_normal(size)
+
+
+def random_state(seed):
+    """
+    Normal source of one trial: RandomState for seeds as for np.random.seed,
+    a counter-based Generator for a Substream, mirrored for Antithetic
+    """
+    if isinstance(seed, Antithetic):
+        return _MirroredState(seed.seed)
+    if isinstance(seed, Substream):
+        return seed.generator()
+    return np.random.RandomState(seed)
+
+
+def noise_blocks(seeds, n_steps, block=NOISE_BLOCK):
+    """
+    Yield standard-normal increments in blocks of timesteps.
+
+    Args:
+        seeds: one seed per trial (None = unseeded, Antithetic = mirrored,
+               Substream = counter-based stream)
+        n_steps: number of transitions to cover
+        block: timesteps per block
+
+    Yields:
+        start: index of the first transition in the block
+        z: array of shape (block_len, n_trials)
+    """
+    states = [random_state(seed) for seed in seeds]
+    for start in range(0, n_steps, block):
+        size = min(block, n_steps - start)
+        z = np.empty((size, len(states)))
+        for j, rs in enumerate(states):
+            z[:, j] = rs.standard_normal(size)
+        yield start, z
+
+
+def iter_noise(seeds, n_steps, block=NOISE_BLOCK, z=None):
+    """noise_blocks(), or blocks of a precomputed increment matrix z"""
+    if z is None:
+        return noise_blocks(seeds, n_steps, block)
+    return ((start, z[start:start + block]) for start in range(0, n_steps, block))
+
+
+def integrate(step_block, x0, n_trials, noise, delay=0, metrics=(),
+              record_x=True, record_u=False, block=NOISE_BLOCK):
+    """
+    Drive a block stepper over all transitions in constant memory.
+
+    Only the current block plus `delay` steps of history is held in a
+    rolling buffer.  Streaming metrics are updated after every block; the
+    full trajectories are stored only on request.
+
+    Args:
+        step_block: function (start, noise, buf, u_buf, hist) advancing
+                    buf[hist + k] -> buf[hist + k + 1] for the len(noise)
+                    transitions from `start` and storing the inputs in u_buf[k]
+        x0: initial state (scalar or shape (n_trials,))
+        n_trials: number of trials
+        noise: iterable of (start, increments) blocks, increments already
+               scaled by sigma * sqrt(dt)
+        delay: steps of state history the stepper may read back
+        metrics: streaming Metric objects (start / update)
+        record_x, record_u: keep the full trajectories
+        block: maximum block length
+
+    Returns:
+        x: state trajectories, shape (steps, n_trials), or None
+        u: control inputs, shape (steps - 1, n_trials), or None
+    """
+    hist = delay
+    buf = np.empty((hist + block + 1, n_trials))
+    buf[hist] = x0
+    u_buf = np.zeros((block, n_trials))
+    xs, us = [buf[hist:hist + 1].copy()], []
+
+    for metric in metrics:
+        metric.start(buf[hist])
+
+    for start, noise_block in noise:
+        n = len(noise_block)
+        step_block(start, noise_block, buf, u_buf, hist)
+        x_new, u_new = buf[hist + 1:hist + 1 + n], u_buf[:n]
+        for metric in metrics:
+            metric.update(x_new, u_new, start)
+        if record_x:
+            xs.append(x_new.copy())
+        if record_u:
+            us.append(u_new.copy())
+        # Keep the last `hist + 1` states (current state + delay history)
+        buf[:hist + 1] = buf[n:n + hist + 1]
+
+    x = np.concatenate(xs) if record_x else None
+    u = (np.concatenate(us) if us else np.zeros((0, n_trials))) if record_u else None
+    return x, u
+
+
+def simulate_batch(drift, d, x0, sigma, dt, seeds, controller=None,
+                   clip=None, delay=0, record_u=False, block=NOISE_BLOCK, z=None,
+                   metrics=(), record_x=True, d_index=None, tile=1, every=1, sample_every=1):
+    """
+    Simulate all trials of an additive-noise SDE with Euler-Maruyama.
+
+    Args:
+        drift: vectorized plant drift f(x)
+        d: disturbance per transition, shape (steps - 1,), or
+           (steps - 1, n_groups) with trial j reading column d_index[j]
+        x0: initial state (scalar or shape (n_trials,))
+        sigma: noise standard deviation (scalar or per trial)
+        dt: time step
+        seeds: one seed per trial, as passed to np.random.seed
+        controller: vectorized control law u = controller(x), or None
+        clip: optional (low, high) state limits applied after each step
+        delay: sensor delay in steps (the controller sees x[k - delay] once k > delay);
+               per-trial or fractional delays and GammaDelay kernels read a
+               DelayLine ring buffer instead of the state history
+        record_u: also return the control input of every transition
+        block: timesteps of noise drawn per block
+        z: precomputed standard-normal increments, shape (steps - 1, n_trials)
+           (e.g. shared.noise_matrix); drawn from seeds when None
+        metrics: streaming Metric objects updated while stepping
+        record_x: keep the state trajectories (False = constant memory)
+        d_index: column of d read by every trial (2-D d only)
+        tile: the seeds' streams are repeated `tile` times side by side, so
+              n_trials = tile * len(seeds) (e.g. one copy per parameter point)
+        every: steps per controller update (u held in between)
+        sample_every: steps per sensor sample (the controller sees the last
+                      sample, taken `delay` steps late)
+
+    Returns:
+        x: state trajectories, shape (steps, n_trials) (None if not record_x)
+        u: control inputs, shape (steps - 1, n_trials) (only if record_u)
+    """
+    d = np.asarray(d, dtype=float)
+    if d.ndim == 2 and d_index is None:
+        raise ValueError("A disturbance per group needs d_index")
+    n_steps = len(d)
+    sqrt_dt = np.sqrt(dt)
+    multirate = every > 1 or sample_every > 1
+    held = {'y': None, 'u': 0.0}  # Zero-order holds of sensor and controller
+    n_trials = tile * len(seeds)
+    # One whole delay for all trials reads back the state history; any
+    # other delay keeps its own ring buffer of the sensed states
+    lag = fixed_delay(delay)
+    line = None
+    if lag is None:
+        line = DelayLine(delay, x0, n_trials) if controller is not None else None
+        lag = 0
+
+    def sense(t, row, buf, xt):
+        if line is not None:
+            return line.read()
+        return buf[row - lag] if lag and t > lag else xt
+
+    def step_block(start, noise, buf, u_buf, hist):
+        for k in range(len(noise)):
+            t = start + k
+            row = hist + k
+            xt = buf[row]
+            if line is not None:
+                line.push(xt)
+            if controller is None:
+                u = 0.0
+            elif not multirate:
+                u = controller(sense(t, row, buf, xt))
+                u_buf[k] = u
+            else:
+                if t % sample_every == 0:
+                    held['y'] = sense(t, row, buf, xt).copy()
+                if t % every == 0:
+                    held['u'] = controller(held['y'])
+                u = held['u']
+                u_buf[k] = u
+            d_t = d[t] if d.ndim == 1 else d[t, d_index]
+            x_next = xt + (drift(xt) + u + d_t) * dt + noise[k]
+            if clip is not None:
+                np.clip(x_next, clip[0], clip[1], out=x_next)
+            buf[row + 1] = x_next
+
+    noise = ((start, sigma * (sqrt_dt * (np.tile(z_block, tile) if tile > 1 else z_block)))
+             for start, z_block in iter_noise(seeds, n_steps, block, z))
+    x, u = integrate(step_block, x0, n_trials, noise, delay=lag, metrics=metrics,
+                     record_x=record_x, record_u=record_u, block=block)
+
+    if record_u:
+        return x, u
+    return x
+
+
+def resolve_backend(backend, plant, controller):
+    """Backend run() actually uses: 'jit' only with Numba and built-in models"""
+    from . import jit
+    if backend == 'jit' and jit.HAVE_NUMBA and jit.supports(plant, controller):
+        return 'jit'
+    return 'numpy'
+
+
+def run(plant, controller, disturbance, time, dt, seeds, x0=1.0,
+        metrics=None, d_at_next=False, record=False, backend='numpy', shared=False,
+        store=None, trial_offset=0, cache=None):
+    """
+    Simulate a plant / controller / disturbance configuration.
+
+    Args:
+        plant: Plant (drift, sigma, clip)
+        controller: Controller
+        disturbance: Disturbance
+        time: sample times, shape (steps,)
+        dt: integration time step
+        seeds: one seed per trial, as passed to np.random.seed
+        x0: initial state
+        metrics: dict of name -> Metric evaluated per trial
+        d_at_next: evaluate d at the time of the new sample (time[k+1])
+                   instead of the current one (time[k])
+        record: also return the trajectories x and u (otherwise the run
+                needs constant memory: metrics are accumulated while stepping)
+        backend: 'numpy' (batch engine) or 'jit' (compiled per-trial kernel,
+                 falls back to 'numpy' without Numba or for custom models)
+        shared: take d(t) and the noise of these seeds from the shared
+                in-memory cache (common random numbers across runs)
+        store: TrajectoryStore the traces are streamed into (to disk, so
+               no trajectory is held in memory even for huge ensembles)
+        trial_offset: store row of the first trial of this run
+        cache: ResultCache; a run with the same model, parameters, seeds and
+               code version returns the stored results without simulating
+               (ignored for unseeded runs and when streaming to a store)
+
+    Returns:
+        results: dict of name -> per-trial metric values
+                 (plus 'x' and 'u' when record is set)
+    """
+    from . import jit, shared as shared_inputs
+
+    metrics = metrics or {}
+    time = np.asarray(time, dtype=float)
+    use_jit = resolve_backend(backend, plant, controller) == 'jit'
+
+    key = None
+    if cache is not None and store is None and all(s is not None for s in seeds):
+        from .cache import run_key
+        key = run_key(plant, controller, disturbance, time, dt, seeds, x0=x0,
+                      metrics=metrics, d_at_next=d_at_next, record=record,
+                      backend=resolve_backend(backend, plant, controller))
+        results = cache.get(key)
+        if results is not None:
+            return results
+
+    d_times = time[1:] if d_at_next else time[:-1]
+    if shared:
+        d = shared_inputs.disturbance_array(disturbance, d_times)
+        z = shared_inputs.noise_matrix(seeds, len(d))
+    else:
+        d = disturbance.sample(d_times)
+        z = None
+
+    controller.reset(len(seeds))
+    streams = list(metrics.values())
+    if store is not None:
+        streams.append(store.writer(trial_offset))
+    options = dict(record_u=record, z=z, metrics=streams, record_x=record)
+    if use_jit:
+        out = jit.simulate_jit(plant, controller, d, x0, dt, seeds, **options)
+    else:
+        out = simulate_batch(
+            plant.drift, d, x0, plant.sigma, dt, seeds,
+            controller=controller, clip=plant.clip, delay=controller.delay,
+            every=controller.every, sample_every=controller.sample_every, **options
+        )
+    x, u = out if record else (out, None)
+
+    results = {name: metric.result() for name, metric in metrics.items()}
+    if store is not None:
+        store.flush()
+    if record:
+        results['x'] = x
+        results['u'] = u
+    if key is not None:
+        cache.put(key, results)
+    return results
@@ -0,0 +1,149 @@
+"""
+Exact OU Transition Sampler
+
+For a linear plant dx = (c - theta x + u + d(t)) dt + sigma dW (OU with
+c = theta * mu, DDM with theta = 0) the transition over [t0, t1] is
+Gaussian:
+
+    x(t1) = e^{-theta h} x(t0) + int_t0^t1 e^{-theta (t1 - s)} (c + u + d(s)) ds + s_h z
+    s_h^2 = sigma^2 (1 - e^{-2 theta h}) / (2 theta),   h = t1 - t0
+
+The forcing integral has a closed form for the Disturbance profile (sine
+wave plus rectangular pulse) and for inputs u held constant over each
+interval, so paths can be sampled on any grid with no discretization
+bias: jump straight between the pulse edges, or sample a coarse output
+grid.  Clipped plants are not linear and are rejected.
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+from .engine import random_state
+from .plants import DDM, OU
+
+
+def linear_coefficients(plant):
+    """(theta, c) of a linear plant f(x) = c - theta * x"""
+    if plant.clip is not None:
+        raise ValueError("Exact sampling does not support clipped plants")
+    if isinstance(plant, OU):
+        return plant.theta, plant.theta * plant.mu
+    if isinstance(plant, DDM):
+        return 0.0, plant.v_drift
+    raise ValueError(f"No exact transition for {type(plant).__name__}")
+
+
+def _decay_integral(theta, lo, hi, t1):
+    """int_lo^hi e^{-theta (t1 - s)} ds for lo <= hi <= t1"""
+    if theta == 0:
+        return hi - lo
+    return (np.exp(-theta * (t1 - hi)) - np.exp(-theta * (t1 - lo))) / theta
+
+
+def _sine_integral(theta, omega, lo, hi, t1):
+    """int_lo^hi e^{-theta (t1 - s)} sin(omega s) ds for lo <= hi <= t1"""
+
+    def antiderivative(s):
+        return (np.exp(-theta * (t1 - s)) * (theta * np.sin(omega * s) - omega * np.cos(omega * s))
+                / (theta**2 + omega**2))
+
+    return antiderivative(hi) - antiderivative(lo)
+
+
+def forcing_integral(theta, disturbance, t0, t1):
+    """
+    int_t0^t1 e^{-theta (t1 - s)} d(s) ds for every interval [t0, t1].
+
+    Args:
+        theta: decay rate (0 for a DDM)
+        disturbance: Disturbance (sine wave + rectangular pulse)
+        t0, t1: interval start and end times (arrays)
+    """
+    t0 = np.asarray(t0, dtype=float)
+    t1 = np.asarray(t1, dtype=float)
+    omega = 2 * np.pi / disturbance.period
+    # Overlap of the pulse window with each interval (empty: p_lo == p_hi)
+    p_lo = np.minimum(np.maximum(t0, disturbance.pulse_start), t1)
+    p_hi = np.maximum(np.minimum(t1, disturbance.pulse_end), p_lo)
+
+    wave = _sine_integral(theta, omega, t0, t1, t1)
+    if disturbance.replace_wave:
+        wave = wave - _sine_integral(theta, omega, p_lo, p_hi, t1)
+    total = (disturbance.amplitude * wave
+             + disturbance.pulse * _decay_integral(theta, p_lo, p_hi, t1))
+    return disturbance.scale * total
+
+
+def transition(plant, disturbance, times, u=0.0):
+    """
+    Coefficients of x[k+1] = a[k] x[k] + m[k] + s[k] z[k] on the grid times.
+
+    Args:
+        plant: OU or DDM (unclipped)
+        disturbance: Disturbance
+        times: sample times, shape (n + 1,), increasing
+        u: input held over each interval (scalar or shape (n,))
+
+    Returns:
+        a, m, s: arrays of shape (n,)
+    """
+    theta, c = linear_coefficients(plant)
+    times = np.asarray(times, dtype=float)
+    t0, t1 = times[:-1], times[1:]
+    h = t1 - t0
+
+    a = np.exp(-theta * h)
+    gain = h if theta == 0 else -np.expm1(-theta * h) / theta
+    var = h if theta == 0 else -np.expm1(-2 * theta * h) / (2 * theta)
+    m = (c + np.asarray(u, dtype=float)) * gain + forcing_integral(theta, disturbance, t0, t1)
+    return a, m, plant.sigma * np.sqrt(var)
+
+
+def sample_exact(plant, disturbance, times, seeds, x0=1.0, u=0.0):
+    """
+    Sample paths of an uncontrolled (or piecewise-constant input) linear
+    plant exactly at the given times.
+
+    Args:
+        plant: OU or DDM (unclipped)
+        disturbance: Disturbance
+        times: sample times (any spacing, e.g. only the pulse edges)
+        seeds: one seed per trial (one RandomState each, None = unseeded)
+        x0: initial state (scalar or shape (n_trials,))
+        u: input held over each interval (scalar or shape (len(times) - 1,))
+
+    Returns:
+        x: paths at times, shape (len(times), n_trials)
+    """
+    a, m, s = transition(plant, disturbance, times, u)
+    n = len(a)
+    z = np.empty((n, len(seeds)))
+    for j, seed in enumerate(seeds):
+        z[:, j] = random_state(seed).standard_normal(n)
+    drive = m[:, None] + s[:, None] * z
+
+    x = np.empty((n + 1, len(seeds)))
+    x[0] = x0
+    if n and np.allclose(a, a[0], rtol=1e-12, atol=0):
+        # Uniform decay: one linear filter over the whole grid
+        x[1:] = lfilter([1.0], [1.0, -a[0]], drive, axis=0, zi=a[0] * x[:1])[0]
+    else:
+        for k in range(n):
+            x[k + 1] = a[k] * x[k] + drive[k]
+    return x
+
+
+def mean_path(plant, disturbance, times, x0=1.0, u=0.0):
+    """Exact mean E[x(t)] at the given times (no sampling)"""
+    a, m, _ = transition(plant, disturbance, times, u)
+    x = np.empty(len(a) + 1)
+    x[0] = x0
+    for k in range(len(a)):
+        x[k + 1] = a[k] * x[k] + m[k]
+    return x
+
+
+def event_times(disturbance, T, t0=0.0):
+    """Grid [t0, pulse_start, pulse_end, T] for jumping between the pulse edges"""
+    edges = [t for t in (disturbance.pulse_start, disturbance.pulse_end) if t0 < t < T]
+    return np.array([t0] + edges + [T])
@@ -0,0 +1,228 @@
+"""
+State Estimation
+
+Estimates the latent state x(t) of the double-well model
+
+    dx = (a x - b x^3 + u) dt + sigma dW,    y = x + N(0, noise^2)
+
+from noisy measurements y, for a batch of subjects at once (one column
+per subject, like the trials of the engine; a, b, sigma and noise may be
+per-subject arrays).
+
+- EKF: extended Kalman filter, drift linearized around the estimate.
+  Two array passes per step, whatever the number of subjects.
+- ParticleFilter: bootstrap filter; particles (subjects x N) propagate
+  through the Euler step of the full nonlinear drift, so it follows the
+  bimodal posterior near the tipping point that the EKF cannot.
+  Systematic resampling is O(N): the number of copies of each particle
+  comes from the cumulative weights directly, without a search, and only
+  subjects whose effective sample size fell below the threshold resample.
+
+Filtered puts either filter between the plant and a controller: each
+update it measures y = x + N(0, noise^2), updates the filter with the
+input applied since the previous measurement, and controls the estimate.
+With a multi-rate schedule (Controller.at_rates) set the filter's dt to
+the controller period.
+"""
+
+import numpy as np
+
+from .controllers import Controller
+from .engine import random_state
+
+
+def _col(value):
+    """Per-subject parameter as a column against (subjects, particles)"""
+    return np.reshape(value, (-1, 1)) if np.ndim(value) else value
+
+
+class EKF:
+    """
+    Extended Kalman filter of the double-well state.
+
+    Args:
+        a, b, sigma: model of the plant (scalars or per subject)
+        dt: time between measurements
+        noise: measurement noise standard deviation
+        x0, p0: prior mean and variance of the state
+        substeps: Euler steps per prediction (for dt long against 1 / a,
+            e.g. a 1 Hz controller)
+    """
+
+    def __init__(self, a=1.0, b=1.0, sigma=0.1, dt=0.01, noise=0.1, x0=1.0, p0=0.01,
+                 substeps=1):
+        self.a = a
+        self.b = b
+        self.sigma = sigma
+        self.dt = dt
+        self.noise = noise
+        self.x0 = x0
+        self.p0 = p0
+        self.substeps = substeps
+        self.reset(1)
+
+    def reset(self, n_subjects):
+        self.mean = np.full(n_subjects, self.x0, dtype=float)
+        self.var = np.full(n_subjects, self.p0, dtype=float)
+        self.started = False
+
+    def predict(self, u=0.0):
+        h = self.dt / self.substeps
+        for _ in range(self.substeps):
+            m = self.mean
+            jacobian = 1 + (self.a - 3 * self.b * m * m) * h
+            self.mean = m + (self.a * m - self.b * m**3 + u) * h
+            self.var = jacobian**2 * self.var + self.sigma**2 * h
+
+    def update(self, y):
+        gain = self.var / (self.var + self.noise**2)
+        self.mean = self.mean + gain * (y - self.mean)
+        self.var = (1 - gain) * self.var
+        return self.mean
+
+    def step(self, y, u=0.0):
+        """Predict with the input u applied since the last measurement, then update with y"""
+        if self.started:
+            self.predict(u)
+        self.started = True
+        return self.update(y)
+
+
+def systematic_resample(weights, rng):
+    """
+    Systematic resampling of every row of normalized weights in O(N).
+
+    Particle i of a row is copied K(c_i) - K(c_{i-1}) times, where c are
+    the cumulative weights and K(c) = #{k : (u + k) / N <= c} =
+    floor(N c - u) + 1 counts the row's N evenly spaced positions.
+
+    Returns:
+        flat indices into weights.ravel(), shape (rows, N)
+    """
+    rows, n = weights.shape
+    cum = np.cumsum(weights, axis=1)
+    cum[:, -1] = 1.0
+    u = rng.random((rows, 1))
+    below = np.clip(np.floor(n * cum - u) + 1, 0, n).astype(np.int64)
+    copies = np.diff(below, axis=1, prepend=0)
+    return np.repeat(np.arange(rows * n), copies.ravel()).reshape(rows, n)
+
+
+class ParticleFilter:
+    """
+    Bootstrap particle filter of the double-well state.
+
+    Args:
+        a, b, sigma, dt, noise, x0, p0, substeps: as for EKF
+        n_particles: particles per subject
+        resample_threshold: resample a subject when its effective sample
+            size drops below this fraction of n_particles
+        seed: seed of the filter's own random numbers (int or Substream)
+    """
+
+    def __init__(self, a=1.0, b=1.0, sigma=0.1, dt=0.01, noise=0.1, x0=1.0, p0=0.01,
+                 n_particles=1000, resample_threshold=0.5, seed=0, substeps=1):
+        self.a = a
+        self.b = b
+        self.sigma = sigma
+        self.dt = dt
+        self.noise = noise
+        self.x0 = x0
+        self.p0 = p0
+        self.n_particles = n_particles
+        self.resample_threshold = resample_threshold
+        self.seed = seed
+        self.substeps = substeps
+        self.reset(1)
+
+    def reset(self, n_subjects):
+        self.rng = random_state(self.seed)
+        shape = (n_subjects, self.n_particles)
+        self.particles = self.x0 + np.sqrt(self.p0) * self.rng.standard_normal(shape)
+        self.log_w = np.zeros(shape)
+        self.mean = np.full(n_subjects, float(self.x0))
+        self.started = False
+        self.resampled = 0
+
+    def predict(self, u=0.0):
+        a, b, sigma, u = _col(self.a), _col(self.b), _col(self.sigma), _col(u)
+        h = self.dt / self.substeps
+        for _ in range(self.substeps):
+            x = self.particles
+            noise = self.rng.standard_normal(x.shape)
+            noise *= sigma * np.sqrt(h)
+            noise += x
+            # x + (a x - b x^3 + u) h + noise, without temporaries for x^3
+            self.particles = x * (a - b * x * x) * h + (u * h + noise)
+
+    def update(self, y):
+        z = (_col(y) - self.particles) / _col(self.noise)
+        log_w = self.log_w - 0.5 * z * z
+        log_w -= log_w.max(axis=1, keepdims=True)
+        w = np.exp(log_w)
+        w /= w.sum(axis=1, keepdims=True)
+        self.mean = np.sum(w * self.particles, axis=1)
+
+        ess = 1.0 / np.sum(w * w, axis=1)
+        low = np.nonzero(ess < self.resample_threshold * self.n_particles)[0]
+        if len(low):
+            idx = systematic_resample(w[low], self.rng)
+            self.particles[low] = self.particles[low].ravel()[idx]
+            log_w[low] = 0.0
+            self.resampled += len(low)
+        self.log_w = log_w
+        return self.mean
+
+    def step(self, y, u=0.0):
+        """Predict with the input u applied since the last measurement, then update with y"""
+        if self.started:
+            self.predict(u)
+        self.started = True
+        return self.update(y)
+
+
+class Filtered(Controller):
+    """
+    Controller acting on a filtered estimate instead of the true state.
+
+    Args:
+        controller: control law fed with the estimate (e.g. CSMC)
+        estimator: EKF, ParticleFilter, or None to control the raw
+            measurement y
+        noise: measurement noise standard deviation (default: the
+            estimator's)
+        seed: seed of the measurement noise (int or Substream)
+    """
+
+    def __init__(self, controller, estimator=None, noise=None, seed=0):
+        super().__init__(controller.delay)
+        self.every = controller.every
+        self.sample_every = controller.sample_every
+        self.controller = controller
+        self.estimator = estimator
+        if noise is None and estimator is None:
+            raise ValueError("Give the measurement noise (no estimator to take it from)")
+        self.noise = estimator.noise if noise is None else noise
+        self.seed = seed
+        self.reset(1)
+
+    def reset(self, n_trials):
+        self.controller.reset(n_trials)
+        if self.estimator is not None:
+            self.estimator.reset(n_trials)
+        self.rng = random_state(self.seed)
+        self.u = np.zeros(n_trials)
+        self.sq_error = np.zeros(n_trials)
+        self.n = 0
+
+    def __call__(self, x):
+        y = x + self.noise * self.rng.standard_normal(np.shape(x))
+        estimate = y if self.estimator is None else self.estimator.step(y, self.u)
+        self.sq_error += (estimate - x) ** 2
+        self.n += 1
+        self.u = np.broadcast_to(self.controller(estimate), np.shape(x)).astype(float)
+        return self.u
+
+    def rmse(self):
+        """Root mean square estimation error of every trial"""
+        return np.sqrt(self.sq_error / max(self.n, 1))
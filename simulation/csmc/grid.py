@@ -0,0 +1,108 @@
+"""
+Batched Parameter Grids
+
+Simulates many parameter points in one pass of the NumPy batch engine:
+the state is a (points x trials) tensor, flattened to columns point by
+point, and every per-point parameter (a, b, sigma, K, phi, the pulse
+magnitude, ...) becomes an array broadcast against it.  The laws are
+elementwise, so -K * tanh((x - r) / phi) with per-column K and phi costs
+the same array pass as a scalar gain.
+
+All points share the trials' noise streams (common random numbers), which
+are drawn once per trial and tiled across the points.  Columns are
+stepped in chunks of at most chunk_size, so memory stays bounded for
+large grids.
+"""
+
+import copy
+
+import numpy as np
+
+from .engine import simulate_batch
+
+
+def _owner(name, plant, controller, disturbance):
+    """Which model a grid parameter belongs to"""
+    owners = [obj for obj in (plant, controller, disturbance) if hasattr(obj, name)]
+    if len(owners) != 1:
+        where = 'no model' if not owners else 'several models'
+        raise ValueError(f"Grid parameter {name!r} is an attribute of {where}")
+    return owners[0]
+
+
+def run_grid(plant, controller, disturbance, time, dt, seeds, params, metrics=None,
+             x0=1.0, d_at_next=False, chunk_size=50000):
+    """
+    Simulate every parameter point x every trial as one tensor per timestep.
+
+    Args:
+        plant, controller, disturbance: base models; the grid overrides
+            their attributes named in params
+        time, dt, x0, d_at_next: as for run()
+        seeds: trials, shared by every point
+        params: dict of attribute name -> one value per point, e.g.
+                {'K': [3, 5, 7], 'phi': [0.2, 0.3, 0.4]}; names are attributes
+                of the plant (a, b, sigma, theta, ...), the controller
+                (K, phi, r, ..., the sensor delay in steps, possibly
+                fractional) or the disturbance (pulse, amplitude, ...)
+        metrics: dict of name -> Metric
+        chunk_size: largest number of (point, trial) columns stepped at once
+
+    Returns:
+        results: dict of name -> array of shape (n_points, n_trials)
+    """
+    metrics = metrics or {}
+    params = {name: np.asarray(values, dtype=float) for name, values in params.items()}
+    n_points = len(next(iter(params.values())))
+    if any(len(values) != n_points for values in params.values()):
+        raise ValueError("Every grid parameter needs one value per point")
+    owners = {name: _owner(name, plant, controller, disturbance) for name in params}
+    seeds = list(seeds)
+    n_trials = len(seeds)
+
+    time = np.asarray(time, dtype=float)
+    d_times = time[1:] if d_at_next else time[:-1]
+    vary_d = any(owner is disturbance for owner in owners.values())
+    d_shared = None if vary_d else disturbance.sample(d_times)
+
+    trial_chunk = min(n_trials, chunk_size)
+    point_chunk = max(1, chunk_size // trial_chunk)
+    results = {name: np.empty((n_points, n_trials)) for name in metrics}
+
+    for p0 in range(0, n_points, point_chunk):
+        points = np.arange(p0, min(p0 + point_chunk, n_points))
+        for t0 in range(0, n_trials, trial_chunk):
+            chunk_seeds = seeds[t0:t0 + trial_chunk]
+            n_t = len(chunk_seeds)
+
+            # Point-major columns: column p * n_t + i is trial i of point p
+            plant_c, controller_c = copy.copy(plant), copy.copy(controller)
+            for name, values in params.items():
+                if owners[name] is plant:
+                    setattr(plant_c, name, np.repeat(values[points], n_t))
+                elif owners[name] is controller:
+                    setattr(controller_c, name, np.repeat(values[points], n_t))
+
+            d_index = None
+            if vary_d:
+                d = np.empty((len(d_times), len(points)))
+                for col, p in enumerate(points):
+                    dist = copy.copy(disturbance)
+                    for name, values in params.items():
+                        if owners[name] is disturbance:
+                            setattr(dist, name, values[p])
+                    d[:, col] = dist.sample(d_times)
+                d_index = np.repeat(np.arange(len(points)), n_t)
+            else:
+                d = d_shared
+
+            controller_c.reset(len(points) * n_t)
+            simulate_batch(plant_c.drift, d, x0, plant_c.sigma, dt, chunk_seeds,
+                           controller=controller_c, clip=plant_c.clip,
+                           delay=controller_c.delay, every=controller_c.every,
+                           sample_every=controller_c.sample_every, metrics=list(metrics.values()),
+                           record_x=False, d_index=d_index, tile=len(points))
+            for name, metric in metrics.items():
+                results[name][points, t0:t0 + n_t] = metric.result().reshape(len(points), n_t)
+
+    return results
@@ -0,0 +1,198 @@
+"""
+JIT Stepping Kernel (optional Numba backend)
+
+A compiled plant + controller step for the built-in models, for runs where
+per-step Python overhead dominates: single trajectories, delayed feedback
+(Phase 1) and the stateful PID.  Each trial is stepped sequentially inside
+one compiled loop.
+
+Numba is optional.  Without it, run(..., backend='jit') falls back to the
+NumPy batch engine.  The kernel uses scalar math (math.tanh, x*x*x), so its
+pure-Python form (step_kernel.py_func) is the bit-exact reference for the
+compiled code.
+"""
+
+import math
+
+import numpy as np
+
+from .delay import fixed_delay
+from .engine import integrate, iter_noise, NOISE_BLOCK
+from .plants import DDM, OU, DoubleWell
+from .controllers import NoControl, PID, RuleBased, CSMC
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+# Model codes understood by the kernel
+PLANT_DDM, PLANT_OU, PLANT_DW = 0, 1, 2
+CTRL_NONE, CTRL_PID, CTRL_RULE, CTRL_CSMC = 0, 1, 2, 3
+
+
+def _scalars(*values):
+    """Whether every parameter is a scalar (the kernel has no per-trial parameters)"""
+    return all(np.ndim(v) == 0 for v in values)
+
+
+def plant_spec(plant):
+    """Return (code, params) for a built-in plant with scalar parameters, or None"""
+    if isinstance(plant, DDM) and _scalars(plant.v_drift):
+        return PLANT_DDM, np.array([plant.v_drift, 0.0])
+    if isinstance(plant, OU) and _scalars(plant.theta, plant.mu):
+        return PLANT_OU, np.array([plant.theta, plant.mu])
+    if isinstance(plant, DoubleWell) and _scalars(plant.a, plant.b):
+        return PLANT_DW, np.array([plant.a, plant.b])
+    return None
+
+
+def controller_spec(controller):
+    """Return (code, params, rules) for a built-in controller with scalar parameters, or None"""
+    no_rules = np.zeros((0, 2))
+    if isinstance(controller, NoControl):
+        return CTRL_NONE, np.zeros(0), no_rules
+    if isinstance(controller, PID) and _scalars(controller.Kp, controller.Ki, controller.Kd,
+                                                controller.r, controller.dt, controller.u_limit):
+        # Integration step of the controller: its period under a schedule
+        params = np.array([controller.Kp, controller.Ki, controller.Kd,
+                           controller.r, controller.dt * controller.every, controller.u_limit])
+        return CTRL_PID, params, no_rules
+    if isinstance(controller, RuleBased):
+        return CTRL_RULE, np.zeros(0), np.array(controller.rules, dtype=float).reshape(-1, 2)
+    if isinstance(controller, CSMC) and _scalars(controller.K, controller.phi, controller.r):
+        return CTRL_CSMC, np.array([controller.K, controller.phi, controller.r]), no_rules
+    return None
+
+
+def supports(plant, controller):
+    """Whether the kernel can simulate this plant / controller pair"""
+    return (plant_spec(plant) is not None and controller_spec(controller) is not None
+            and fixed_delay(controller.delay) is not None)
+
+
+@njit(cache=True)
+def step_kernel(plant_code, pp, ctrl_code, cp, rules, d, noise, start,
+                buf, u_buf, hist, pid_state, dt, clip_lo, clip_hi, delay,
+                hold, every, sample_every):
+    """
+    Advance every trial through one block of transitions.
+
+    Args:
+        plant_code, pp: plant model code and parameters
+        ctrl_code, cp, rules: controller code, parameters and rule table
+        d: disturbance per transition, shape (steps - 1,)
+        noise: sigma * sqrt(dt) * z for this block, shape (block_len, n_trials)
+        start: index of the first transition in the block
+        buf: rolling state buffer (see engine.integrate); row hist + k holds
+             the state before transition start + k
+        u_buf: control inputs of the block, updated in place
+        hist: rows of history in front of the current state
+        pid_state: (integral, prev_error) per trial, updated in place
+        dt: time step
+        clip_lo, clip_hi: state limits (+/-inf for none)
+        delay: sensor delay in steps
+        hold: (sensor sample, control input) held per trial, updated in place
+        every, sample_every: steps per controller update / sensor sample
+    """
+    n_block, n_trials = noise.shape
+    for j in range(n_trials):
+        integral = pid_state[j, 0]
+        prev_error = pid_state[j, 1]
+        xs = hold[j, 0]
+        ut = hold[j, 1]
+        for k in range(n_block):
+            t = start + k
+            row = hist + k
+            xt = buf[row, j]
+            if t % sample_every == 0:
+                xs = buf[row - delay, j] if delay > 0 and t > delay else xt
+
+            # Control input (held between controller updates)
+            if t % every != 0:
+                pass
+            elif ctrl_code == CTRL_CSMC:
+                s = xs - cp[2]
+                if cp[1] > 0:
+                    ut = -cp[0] * math.tanh(s / cp[1])
+                elif s > 0:
+                    ut = -cp[0]
+                elif s < 0:
+                    ut = cp[0]
+                else:
+                    ut = 0.0
+            elif ctrl_code == CTRL_PID:
+                error = cp[3] - xs
+                integral = integral + error * cp[4]
+                derivative = (error - prev_error) / cp[4]
+                prev_error = error
+                ut = cp[0] * error + cp[1] * integral + cp[2] * derivative
+                ut = min(max(ut, -cp[5]), cp[5])
+            elif ctrl_code == CTRL_RULE:
+                ut = 0.0
+                for i in range(rules.shape[0] - 1, -1, -1):
+                    if xs < rules[i, 0]:
+                        ut = rules[i, 1]
+            else:
+                ut = 0.0
+            u_buf[k, j] = ut
+
+            # Plant drift
+            if plant_code == PLANT_DW:
+                f = pp[0] * xt - pp[1] * (xt * xt * xt)
+            elif plant_code == PLANT_OU:
+                f = pp[0] * (pp[1] - xt)
+            else:
+                f = pp[0]
+
+            x_next = xt + (f + ut + d[t]) * dt + noise[k, j]
+            buf[row + 1, j] = min(max(x_next, clip_lo), clip_hi)
+        pid_state[j, 0] = integral
+        pid_state[j, 1] = prev_error
+        hold[j, 0] = xs
+        hold[j, 1] = ut
+
+
+def simulate_jit(plant, controller, d, x0, dt, seeds, record_u=False,
+                 block=NOISE_BLOCK, kernel=None, z=None, metrics=(), record_x=True):
+    """
+    Simulate built-in models with the compiled kernel.
+
+    Same arguments and returns as engine.simulate_batch; the noise stream
+    is identical (one RandomState per trial, or the precomputed increments
+    z).  kernel overrides the compiled function, e.g. step_kernel.py_func
+    for the reference run.
+    """
+    if kernel is None:
+        kernel = step_kernel
+    plant_code, pp = plant_spec(plant)
+    ctrl_code, cp, rules = controller_spec(controller)
+    clip_lo, clip_hi = plant.clip if plant.clip is not None else (-np.inf, np.inf)
+
+    d = np.asarray(d, dtype=float)
+    n_steps = len(d)
+    n_trials = len(seeds)
+    sqrt_dt = np.sqrt(dt)
+    pid_state = np.zeros((n_trials, 2))
+    hold = np.zeros((n_trials, 2))
+    delay = fixed_delay(controller.delay)
+
+    def step_block(start, noise, buf, u_buf, hist):
+        kernel(plant_code, pp, ctrl_code, cp, rules, d, noise, start,
+               buf, u_buf, hist, pid_state, dt, float(clip_lo), float(clip_hi),
+               delay, hold, controller.every, controller.sample_every)
+
+    noise = ((start, plant.sigma * (sqrt_dt * z_block))
+             for start, z_block in iter_noise(seeds, n_steps, block, z))
+    x, u = integrate(step_block, x0, n_trials, noise, delay=delay,
+                     metrics=metrics, record_x=record_x, record_u=record_u, block=block)
+
+    if record_u:
+        return x, u
+    return x
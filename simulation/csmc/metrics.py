@@ -0,0 +1,175 @@
+"""
+Trajectory Metrics
+
+Each metric maps the state trajectories x (steps, n_trials) and control
+inputs u (steps - 1, n_trials) to one value per trial.
+
+Metrics are also online accumulators, so long horizons need no trace:
+start(x0) resets them with the initial state, update(x, u, start) folds in
+one block of new states x[start + 1 : start + 1 + len(x)] and the inputs
+u[start : start + len(u)] that produced them, and result() returns the
+per-trial values.  Calling a metric on full arrays gives the same result.
+"""
+
+import numpy as np
+
+
+class Metric:
+    """Base class: subclasses implement start / update / result"""
+
+    needs_u = False
+
+    def start(self, x0):
+        raise NotImplementedError
+
+    def update(self, x, u, start):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+    def __call__(self, x, u):
+        self.start(x[0])
+        self.update(x[1:], u, 0)
+        return self.result()
+
+
+class Compliance(Metric):
+    """Percentage of time spent inside the allowed band [low, high]"""
+
+    def __init__(self, low=0.8, high=1.2):
+        self.low = low
+        self.high = high
+
+    def _inside(self, x):
+        return (x >= self.low) & (x <= self.high)
+
+    def start(self, x0):
+        self.count = self._inside(x0).astype(np.int64)
+        self.n = 1
+
+    def update(self, x, u, start):
+        self.count += np.sum(self._inside(x), axis=0)
+        self.n += len(x)
+
+    def result(self):
+        return self.count / self.n * 100
+
+
+class Success(Metric):
+    """Whether the state stayed above the tipping point for the whole run"""
+
+    def __init__(self, threshold=0.0):
+        self.threshold = threshold
+
+    def start(self, x0):
+        self.ok = np.asarray(x0 > self.threshold).copy()
+
+    def update(self, x, u, start):
+        self.ok &= np.all(x > self.threshold, axis=0)
+
+    def result(self):
+        return self.ok.copy()
+
+
+class MeanAbsError(Metric):
+    """Mean absolute error from the target"""
+
+    def __init__(self, r=1.0):
+        self.r = r
+
+    def start(self, x0):
+        self.total = np.abs(x0 - self.r).astype(float)
+        self.n = 1
+
+    def update(self, x, u, start):
+        self.total += np.sum(np.abs(x - self.r), axis=0)
+        self.n += len(x)
+
+    def result(self):
+        return self.total / self.n
+
+
+class Chattering(Metric):
+    """Number of sign changes in the control input derivative (u starts at 0)"""
+
+    needs_u = True
+
+    def start(self, x0):
+        n_trials = np.shape(x0)[0]
+        self.count = np.zeros(n_trials, dtype=np.int64)
+        self.last_u = np.zeros(n_trials)
+        self.last_sign = None
+
+    def update(self, x, u, start):
+        if len(u) == 0:
+            return
+        signs = np.sign(np.diff(np.vstack([self.last_u, u]), axis=0))
+        if self.last_sign is not None:
+            signs = np.vstack([self.last_sign, signs])
+        self.count += np.sum(np.abs(np.diff(signs, axis=0)) > 0, axis=0)
+        self.last_u = u[-1].copy()
+        self.last_sign = signs[-1].copy()
+
+    def result(self):
+        return self.count.copy()
+
+
+class Interventions(Metric):
+    """Number of interventions: onsets of |u| > threshold (u starts at 0)"""
+
+    needs_u = True
+
+    def __init__(self, threshold=0.5):
+        self.threshold = threshold
+
+    def start(self, x0):
+        n_trials = np.shape(x0)[0]
+        self.count = np.zeros(n_trials, dtype=np.int64)
+        self.active = np.zeros(n_trials, dtype=bool)
+
+    def update(self, x, u, start):
+        if len(u) == 0:
+            return
+        active = np.abs(u) > self.threshold
+        before = np.vstack([self.active, active[:-1]])
+        self.count += np.sum(active & ~before, axis=0)
+        self.active = active[-1].copy()
+
+    def result(self):
+        return self.count.copy()
+
+
+class TimeToRecovery(Metric):
+    """
+    Time [s] from t_from until the state first re-enters [low, high]
+    (0 if it is inside at t_from, NaN if it never recovers).
+
+    Args:
+        t_from: start of the recovery window [s] (e.g. end of the panic pulse)
+        dt: time step between samples
+        low, high: band counted as recovered
+    """
+
+    def __init__(self, t_from=840.0, dt=0.01, low=0.8, high=1.2):
+        self.t_from = t_from
+        self.dt = dt
+        self.low = low
+        self.high = high
+
+    def _check(self, x, first_step):
+        steps = first_step + np.arange(len(x))
+        eligible = (steps >= self.i_from)[:, None] & (x >= self.low) & (x <= self.high)
+        hit = eligible.any(axis=0) & (self.step < 0)
+        self.step[hit] = steps[np.argmax(eligible[:, hit], axis=0)]
+
+    def start(self, x0):
+        self.i_from = int(round(self.t_from / self.dt))
+        self.step = np.full(np.shape(x0)[0], -1, dtype=np.int64)
+        self._check(np.asarray(x0)[None, :], 0)
+
+    def update(self, x, u, start):
+        self._check(x, start + 1)
+
+    def result(self):
+        return np.where(self.step >= 0, (self.step - self.i_from) * self.dt, np.nan)
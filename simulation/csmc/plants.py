@@ -0,0 +1,76 @@
+"""
+Plant Models
+
+Every plant is an additive-noise SDE
+
+    dx = (f(x) + u + d) dt + sigma dW
+
+and exposes the vectorized drift f(x), the noise level sigma and optional
+hard state limits (clip) applied after each Euler-Maruyama step.
+"""
+
+
+class Plant:
+    """Base class: subclasses implement drift(x)"""
+
+    def __init__(self, sigma=0.05, clip=None):
+        self.sigma = sigma
+        self.clip = clip  # (low, high) or None
+
+    def drift(self, x):
+        raise NotImplementedError
+
+
+class DDM(Plant):
+    """
+    Drift Diffusion Model: f(x) = v_drift
+
+    Args:
+        v_drift: recall ability (constant drift)
+        sigma: noise standard deviation
+    """
+
+    def __init__(self, v_drift=0.05, sigma=0.05, clip=None):
+        super().__init__(sigma, clip)
+        self.v_drift = v_drift
+
+    def drift(self, x):
+        return self.v_drift
+
+
+class OU(Plant):
+    """
+    Ornstein-Uhlenbeck process: f(x) = theta * (mu - x)
+
+    Args:
+        theta: recovery rate (1/tau)
+        mu: baseline level
+        sigma: noise standard deviation
+    """
+
+    def __init__(self, theta=0.5, mu=1.0, sigma=0.05, clip=None):
+        super().__init__(sigma, clip)
+        self.theta = theta
+        self.mu = mu
+
+    def drift(self, x):
+        return self.theta * (self.mu - x)
+
+
+class DoubleWell(Plant):
+    """
+    Double-Well Potential: V(x) = -a/2 x^2 + b/4 x^4, f(x) = -dV/dx = ax - bx^3
+
+    Args:
+        a: potential depth (higher = deeper / more stable)
+        b: cubic nonlinearity
+        sigma: noise standard deviation
+    """
+
+    def __init__(self, a=1.0, b=1.0, sigma=0.1, clip=None):
+        super().__init__(sigma, clip)
+        self.a = a
+        self.b = b
+
+    def drift(self, x):
+        return self.a * x - self.b * x**3
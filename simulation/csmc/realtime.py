@@ -0,0 +1,246 @@
+"""
+Real-Time Control Service
+
+Runs a control law (any Controller, e.g. CSMC) against a live stream of
+timestamped sensor samples with asyncio:
+
+    source --submit(t, y)--> bounded queue --> estimator --> controller --> sink
+
+- Backpressure: the input queue is bounded.  policy='block' makes the
+  producer wait for room; policy='drop_oldest' keeps the newest samples and
+  counts the dropped ones (a late state measurement is worth less than a
+  fresh one).
+- Latency bound: a sample that waited longer than max_latency still updates
+  the state estimate but emits no intervention (counted as stale), so a
+  backlog never turns into a burst of outdated control inputs.
+- Metrics: latency from submit() to the emitted intervention (p50/p99/max)
+  and jitter (standard deviation of the latency and of the intervals
+  between interventions), over the last `history` interventions.
+- Shutdown: close() flags the service closed without waiting for room in
+  the queue; run() returns once the queued samples, and those of producers
+  already waiting for room, are processed.  Samples submitted afterwards
+  are refused (counted).
+
+Sources: replay() paces a recorded trajectory at real time (or `speed`
+times faster) for load tests without hardware; serve() accepts samples as
+"t,y" text lines over a local TCP socket.
+"""
+
+import asyncio
+import math
+import time as timer
+from collections import namedtuple
+
+import numpy as np
+
+Intervention = namedtuple('Intervention', 't x u latency')
+
+
+class LowPass:
+    """
+    State estimate by first-order smoothing of the measurements.
+
+    x_hat += (1 - exp(-(t - t_prev) / tau)) * (y - x_hat); tau = 0 passes
+    the measurement through unchanged.
+    """
+
+    def __init__(self, tau=0.0):
+        self.tau = tau
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.t = None
+
+    def update(self, t, y):
+        if self.x is None or self.tau <= 0:
+            self.x = y
+        else:
+            self.x += -math.expm1(-(t - self.t) / self.tau) * (y - self.x)
+        self.t = t
+        return self.x
+
+
+class LatencyStats:
+    """Latencies [s] and emission times of the most recent interventions"""
+
+    def __init__(self, history=10000):
+        self.latency = np.zeros(history)
+        self.emitted = np.zeros(history)
+        self.count = 0
+
+    def record(self, latency, now):
+        i = self.count % len(self.latency)
+        self.latency[i] = latency
+        self.emitted[i] = now
+        self.count += 1
+
+    def summary(self):
+        n = min(self.count, len(self.latency))
+        if n == 0:
+            return {'count': 0}
+        latency = self.latency[:n]
+        # Emission times in order, for the interval jitter
+        emitted = np.roll(self.emitted, -(self.count % len(self.emitted)))[-n:]
+        intervals = np.diff(emitted)
+        return {
+            'count': self.count,
+            'p50': np.percentile(latency, 50),
+            'p99': np.percentile(latency, 99),
+            'max': latency.max(),
+            'mean': latency.mean(),
+            'jitter': latency.std(),
+            'interval_jitter': intervals.std() if len(intervals) else 0.0,
+        }
+
+
+class ControlService:
+    """
+    Asyncio control loop over a bounded sample queue.
+
+    Args:
+        controller: control law u = controller(x) (e.g. CSMC); it is called
+            with the scalar state estimate
+        estimator: object with update(t, y) -> state estimate
+            (default: LowPass(0), the measurement itself)
+        sink: callable(Intervention), or coroutine function, receiving
+            every intervention (default: only kept as self.last)
+        queue_size: capacity of the input queue
+        policy: 'block' (producers wait) or 'drop_oldest'
+        max_latency: samples older than this [s] when dequeued emit nothing
+        history: interventions kept for the latency statistics
+    """
+
+    def __init__(self, controller, estimator=None, sink=None, queue_size=256,
+                 policy='block', max_latency=None, history=10000):
+        if policy not in ('block', 'drop_oldest'):
+            raise ValueError(f"Unknown policy {policy!r} (use 'block' or 'drop_oldest')")
+        self.controller = controller
+        self.estimator = estimator or LowPass()
+        self.sink = sink
+        self.policy = policy
+        self.max_latency = max_latency
+        self.stats = LatencyStats(history)
+        self.queue = asyncio.Queue(queue_size)
+        self.received = 0
+        self.dropped = 0
+        self.stale = 0
+        self.refused = 0
+        self.closed = False
+        self.waiting = 0  # Producers blocked on a full queue (policy='block')
+        self.last = None
+
+    async def submit(self, t, y):
+        """Enqueue one sample (waits for room with policy='block'; refused after close())"""
+        if self.closed:
+            self.refused += 1
+            return
+        item = (t, y, timer.perf_counter())
+        self.received += 1
+        if self.policy == 'block':
+            self.waiting += 1
+            try:
+                await self.queue.put(item)
+            finally:
+                self.waiting -= 1
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def close(self):
+        """Stop run() once the queued samples are processed (never waits for room)"""
+        self.closed = True
+        # The flag is what stops run(); the sentinel only wakes it up when
+        # it waits on an empty queue, so a full queue needs none.  Producers
+        # already waiting for room still get their samples in
+        if not self.queue.full():
+            self.queue.put_nowait(None)
+
+    async def run(self):
+        """Process samples until close(); returns report()"""
+        self.controller.reset(1)
+        sink_is_async = asyncio.iscoroutinefunction(self.sink)
+        while not (self.closed and self.queue.empty() and self.waiting == 0):
+            item = await self.queue.get()
+            self.queue.task_done()
+            if item is None:
+                continue  # Wake-up from close(); the loop condition decides
+            t, y, arrived = item
+            x = self.estimator.update(t, y)
+            if self.max_latency is not None and timer.perf_counter() - arrived > self.max_latency:
+                self.stale += 1
+                continue
+            u = float(self.controller(x))
+            now = timer.perf_counter()
+            self.last = Intervention(t, x, u, now - arrived)
+            self.stats.record(now - arrived, now)
+            if self.sink is not None:
+                if sink_is_async:
+                    await self.sink(self.last)
+                else:
+                    self.sink(self.last)
+        return self.report()
+
+    def report(self):
+        """Latency summary plus received / dropped / stale / refused counts"""
+        return dict(self.stats.summary(), received=self.received,
+                    dropped=self.dropped, stale=self.stale, refused=self.refused)
+
+
+async def replay(service, times, values, speed=1.0):
+    """
+    Submit a recorded trajectory at its own pace.
+
+    Args:
+        times, values: sample times [s] and measurements
+        speed: playback speed (1 = real time, math.inf = as fast as the
+            service accepts them)
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    t0 = times[0]
+    for t, y in zip(times, values):
+        delay = start + (t - t0) / speed - loop.time()
+        # Yield at least once per sample so the service keeps up
+        await asyncio.sleep(max(delay, 0.0))
+        await service.submit(float(t), float(y))
+
+
+async def serve(service, host='127.0.0.1', port=8765):
+    """
+    Accept samples as "t,y" lines over TCP (one connection per sensor).
+
+    Returns:
+        the asyncio Server (close it with server.close())
+    """
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    t, y = map(float, line.split(b','))
+                except ValueError:
+                    continue  # Malformed line: skip it, keep the stream
+                await service.submit(t, y)
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def send(times, values, host='127.0.0.1', port=8765, speed=1.0):
+    """Replay a trajectory to serve() over TCP as "t,y" lines"""
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    t0 = times[0]
+    for t, y in zip(times, values):
+        delay = start + (t - t0) / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        writer.write(f'{float(t)!r},{float(y)!r}\n'.encode())
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
@@ -0,0 +1,121 @@
+"""
+Adaptive Grid Refinement
+
+Locates the stability boundary of a success-rate map without evaluating a
+uniform fine grid.  The box is first sampled on a coarse grid; each level
+then bisects only the cells whose corner success rates straddle one of the
+thresholds (e.g. 50% / 90%).
+
+Grid vertices are stored as integer lattice coordinates at the finest
+level, so points shared by neighbouring cells are evaluated only once.
+"""
+
+from itertools import product
+
+import numpy as np
+
+
+def _cell_corners(origin, size, n_dims):
+    return [tuple(o + c * size for o, c in zip(origin, corner))
+            for corner in product((0, 1), repeat=n_dims)]
+
+
+def refine_grid(evaluate, bounds, n_coarse=5, max_level=3, thresholds=(50.0, 90.0)):
+    """
+    Adaptively sample a success-rate map on a box.
+
+    Args:
+        evaluate: function (points, level) -> success rates [%] of a list
+                  of parameter points (tuples), e.g. a wrapper around
+                  run_sweep seeded per level
+        bounds: (low, high) per parameter axis
+        n_coarse: grid points per axis on the coarse level
+        max_level: number of bisection levels
+        thresholds: success rates [%] whose crossing triggers refinement
+
+    Returns:
+        result: dict with
+            'points': evaluated parameter points, shape (n, n_dims)
+            'rates': their success rates [%]
+            'cells': finest boundary cells as (lower corner, upper corner)
+            'cell_rates': success rates at the corners of each boundary cell
+            'n_uniform': points a uniform grid at the finest level would need
+    """
+    n_dims = len(bounds)
+    low = np.array([b[0] for b in bounds], dtype=float)
+    high = np.array([b[1] for b in bounds], dtype=float)
+    n_fine = (n_coarse - 1) * 2**max_level  # Cells per axis at the finest level
+    step = (high - low) / n_fine
+
+    rates = {}
+
+    def to_point(idx):
+        return tuple(float(v) for v in low + np.array(idx) * step)
+
+    def evaluate_missing(indices, level):
+        missing = sorted(set(i for i in indices if i not in rates))
+        if missing:
+            values = evaluate([to_point(i) for i in missing], level)
+            rates.update(zip(missing, values))
+
+    def crosses(cell):
+        corner_rates = [rates[c] for c in cell]
+        lo, hi = min(corner_rates), max(corner_rates)
+        return any(lo < thr <= hi for thr in thresholds)
+
+    # Coarse level: every cell of the n_coarse grid
+    size = 2**max_level
+    cells = [_cell_corners(origin, size, n_dims)
+             for origin in product(range(0, n_fine, size), repeat=n_dims)]
+    evaluate_missing([c for cell in cells for c in cell], 0)
+    cells = [cell for cell in cells if crosses(cell)]
+
+    # Refinement: bisect boundary cells along every axis
+    for level in range(1, max_level + 1):
+        size //= 2
+        children = []
+        for cell in cells:
+            origin = cell[0]
+            for offset in product((0, size), repeat=n_dims):
+                child_origin = tuple(o + s for o, s in zip(origin, offset))
+                children.append(_cell_corners(child_origin, size, n_dims))
+        evaluate_missing([c for cell in children for c in cell], level)
+        cells = [cell for cell in children if crosses(cell)]
+
+    indices = sorted(rates)
+    return {
+        'points': np.array([to_point(i) for i in indices]),
+        'rates': np.array([rates[i] for i in indices]),
+        'cells': [(to_point(cell[0]), to_point(cell[-1])) for cell in cells],
+        'cell_rates': [[rates[c] for c in cell] for cell in cells],
+        'n_uniform': (n_fine + 1)**n_dims,
+    }
+
+
+def boundary_surface(result, threshold):
+    """
+    Interpolate the iso-surface success rate == threshold.
+
+    Along every edge of the finest boundary cells whose end points straddle
+    the threshold, the crossing is located by linear interpolation.
+
+    Returns:
+        points: crossing points, shape (n, n_dims)
+    """
+    points = set()
+    for (lower, upper), corner_rates in zip(result['cells'], result['cell_rates']):
+        n_dims = len(lower)
+        corners = [tuple(upper[k] if c[k] else lower[k] for k in range(n_dims))
+                   for c in product((0, 1), repeat=n_dims)]
+        for i, j in product(range(len(corners)), repeat=2):
+            # Edges connect corners that differ along exactly one axis
+            if i >= j or sum(a != b for a, b in zip(corners[i], corners[j])) != 1:
+                continue
+            ri, rj = corner_rates[i], corner_rates[j]
+            if (ri < threshold) == (rj < threshold) or ri == rj:
+                continue
+            w = (threshold - ri) / (rj - ri)
+            points.add(tuple(round(a + w * (b - a), 12)
+                             for a, b in zip(corners[i], corners[j])))
+    n_dims = result['points'].shape[1]
+    return np.array(sorted(points)).reshape(-1, n_dims)
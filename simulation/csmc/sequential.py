@@ -0,0 +1,130 @@
+"""
+Sequential Monte Carlo Stopping
+
+Instead of a fixed n_trials per cell (controller or parameter point),
+trials are launched in batches until every estimate is tight enough:
+
+- the Wilson score interval of a success rate has half-width <= success_tol
+- the standard error of the mean of a continuous metric is <= its sem_tol
+
+Each round gives one more batch to every cell that has not converged, so
+easy cells (a rate stuck at 0% or 100%) stop after a batch or two and the
+compute goes to the ambiguous ones.  Trial indices continue across
+batches (0, 1, ..., batch - 1, batch, ...), so a cell that stops at n
+trials has exactly the results of a fixed run with n_trials = n.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+
+def wilson_interval(successes, n, confidence=0.95):
+    """
+    Wilson score interval of a binomial proportion.
+
+    Unlike the normal interval it stays inside [0, 1] and does not collapse
+    to zero width at 0% or 100%.
+
+    Returns:
+        (low, high) as fractions
+    """
+    if n == 0:
+        return 0.0, 1.0
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    p = successes / n
+    denom = 1 + z**2 / n
+    centre = (p + z**2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    return float(max(centre - half, 0.0)), float(min(centre + half, 1.0))
+
+
+def _status(values, success, success_tol, sem_tol, confidence):
+    """Interval, standard errors and convergence of one cell"""
+    n = len(next(iter(values.values())))
+    ci = None
+    done = True
+    if success is not None:
+        ci = wilson_interval(np.sum(values[success]), n, confidence)
+        done &= (ci[1] - ci[0]) / 2 <= success_tol
+    sems = {}
+    for name, tol in sem_tol.items():
+        finite = np.asarray(values[name], dtype=float)
+        finite = finite[np.isfinite(finite)]
+        sems[name] = stats.sem(finite) if len(finite) > 1 else np.inf
+        done &= sems[name] <= tol
+    return {'n_trials': n, 'ci': ci, 'sem': sems, 'converged': bool(done)}
+
+
+def run_sequential(simulate, cells, batch=100, success=None, success_tol=0.05,
+                   sem_tol=None, confidence=0.95, max_trials=10000, n_workers=1,
+                   verbose=False):
+    """
+    Run batches of trials per cell until the requested precision is reached.
+
+    Args:
+        simulate: function (cell, trial_indices) -> dict of name -> per-trial
+                  values (e.g. a wrapper around run()); must be picklable
+                  (module-level) when n_workers > 1
+        cells: cell keys, e.g. controller names or parameter tuples
+        batch: trials per batch
+        success: name of the boolean metric whose success rate is controlled
+                 (None: no rate criterion)
+        success_tol: largest Wilson half-width of that rate (fraction, 0.05 = 5 points)
+        sem_tol: dict of name -> largest standard error of the mean of that
+                 metric (non-finite values such as NaN recovery times are ignored)
+        confidence: level of the Wilson interval
+        max_trials: trials after which a cell stops even if not converged
+        n_workers: processes running the batches of one round (1 = in this process)
+        verbose: print the progress of every cell after each round
+
+    Returns:
+        results: dict of cell -> {
+            'values': dict of name -> per-trial values (all trials),
+            'n_trials': trials run,
+            'ci': Wilson interval (low, high) of the success rate, or None,
+            'sem': dict of name -> standard error of the mean,
+            'converged': whether the tolerances were met before max_trials
+        }
+    """
+    cells = list(cells)
+    sem_tol = sem_tol or {}
+    parts = {cell: {} for cell in cells}
+    results = {}
+    open_cells = list(cells)
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+
+    try:
+        while open_cells:
+            jobs = {}
+            for cell in open_cells:
+                n = results[cell]['n_trials'] if cell in results else 0
+                indices = range(n, min(n + batch, max_trials))
+                if executor is None:
+                    jobs[cell] = simulate(cell, indices)
+                else:
+                    jobs[cell] = executor.submit(simulate, cell, indices)
+
+            for cell, out in jobs.items():
+                out = out if executor is None else out.result()
+                for name, values in out.items():
+                    parts[cell].setdefault(name, []).append(np.asarray(values))
+                values = {name: np.concatenate(chunks) for name, chunks in parts[cell].items()}
+                results[cell] = dict(values=values,
+                                     **_status(values, success, success_tol, sem_tol, confidence))
+                if verbose:
+                    res = results[cell]
+                    ci = '' if res['ci'] is None else \
+                        f", rate CI [{res['ci'][0] * 100:.1f}, {res['ci'][1] * 100:.1f}]%"
+                    print(f"  {cell}: {res['n_trials']} trials{ci}"
+                          f"{' (converged)' if res['converged'] else ''}")
+
+            open_cells = [cell for cell in open_cells
+                          if not results[cell]['converged']
+                          and results[cell]['n_trials'] < max_trials]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return results
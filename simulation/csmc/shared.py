@@ -0,0 +1,115 @@
+"""
+Shared Precomputed Inputs
+
+Builds the disturbance vector d(t) and the per-seed noise matrix once and
+keeps them in an in-memory LRU cache (bounded in bytes).  Every run that
+asks for the same disturbance / time grid or the same seeds receives a
+read-only view of the same array, so comparing controllers under common
+random numbers costs one noise generation instead of one per controller.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from .engine import noise_blocks, Antithetic
+from .streams import Substream
+
+
+class ArrayCache:
+    """
+    LRU cache of read-only arrays, evicting the least recently used entries
+    once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=1 << 30):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, build):
+        """Return the cached array for key, building it on a miss"""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key].view()
+
+        self.misses += 1
+        arr = np.ascontiguousarray(build())
+        arr.setflags(write=False)
+        self._entries[key] = arr
+        self.n_bytes += arr.nbytes
+        while self.n_bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.n_bytes -= old.nbytes
+        return arr.view()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.n_bytes = 0
+
+
+_cache = ArrayCache()
+
+
+def _array_digest(arr):
+    return hashlib.sha1(np.ascontiguousarray(arr, dtype=float).tobytes()).hexdigest()
+
+
+def _seed_key(seed):
+    if isinstance(seed, Antithetic):
+        return ('antithetic', _seed_key(seed.seed))
+    if isinstance(seed, Substream):
+        return ('substream', json.dumps(seed.key(), sort_keys=True))
+    return int(seed) if np.ndim(seed) == 0 else tuple(int(v) for v in seed)
+
+
+def seeds_key(seeds):
+    """Hashable key of a seed list (ints, uint32 seed arrays, Antithetic or Substream)"""
+    return tuple(_seed_key(s) for s in seeds)
+
+
+def disturbance_array(disturbance, times):
+    """Read-only d(t) sampled on times, shared by every run"""
+    key = ('d', disturbance.key(), _array_digest(times))
+    return _cache.get(key, lambda: disturbance.sample(times))
+
+
+def noise_matrix(seeds, n_steps):
+    """
+    Read-only standard-normal increments, shape (n_steps, n_trials).
+
+    Column i is exactly the stream of np.random.RandomState(seeds[i]).
+    Unseeded trials (None) cannot be shared and raise ValueError.
+    """
+    if any(s is None for s in seeds):
+        raise ValueError("Shared noise requires explicit seeds")
+
+    def build():
+        z = np.empty((n_steps, len(seeds)))
+        for start, block in noise_blocks(seeds, n_steps):
+            z[start:start + len(block)] = block
+        return z
+
+    return _cache.get(('z', seeds_key(seeds), n_steps), build)
+
+
+def cache_info():
+    """Hits, misses and resident size of the shared cache"""
+    return {'hits': _cache.hits, 'misses': _cache.misses,
+            'entries': len(_cache), 'bytes': _cache.n_bytes}
+
+
+def set_cache_size(max_bytes):
+    _cache.max_bytes = max_bytes
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,242 @@
+"""
+Memory-Mapped Trajectory Store
+
+Keeps Monte Carlo traces on disk instead of in RAM.  A store is a directory
+holding
+
+    x.npy      state trajectories, shape (n_trials, n_steps)
+    u.npy      control inputs, shape (n_trials, n_steps - 1) (optional)
+    meta.json  model, parameters, seeds, dt and anything else passed in
+
+The arrays are .npy files opened with np.lib.format.open_memmap, so they can
+also be read with np.load(path, mmap_mode='r').  The engines write them block
+by block through a streaming writer (see run(..., store=...)), and readers
+slice single trials or time windows without loading the ensemble:
+10k trials x 180k steps is 7.2 GB in float32 on disk but a trial is 720 kB.
+"""
+
+import inspect
+import json
+import os
+
+import numpy as np
+
+from .engine import run, resolve_backend, Antithetic
+from .controllers import Controller
+from .delay import GammaDelay
+from .metrics import Metric
+from .streams import Substream
+
+
+def describe(obj):
+    """
+    JSON-friendly description of a model object: its type plus the
+    constructor arguments (read back from the attributes of the same name),
+    so run-time state such as PID integrators is left out.
+    """
+    info = {'type': type(obj).__name__}
+    for name, param in inspect.signature(type(obj).__init__).parameters.items():
+        if name == 'self' or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        if hasattr(obj, name):
+            info[name] = json.loads(json.dumps(getattr(obj, name), default=_json_default))
+    if isinstance(obj, Controller):
+        # Set by at_rates() rather than the constructor
+        info.update(every=obj.every, sample_every=obj.sample_every)
+    return info
+
+
+class TrajectoryStore:
+    """
+    On-disk ensemble of trajectories, shape (n_trials, n_steps).
+
+    Use TrajectoryStore.create() to allocate a new store and
+    TrajectoryStore.open() to read one back.  x (and u) are np.memmap arrays:
+    indexing them returns views backed by the file.
+    """
+
+    def __init__(self, path, x, u, meta):
+        self.path = path
+        self.x = x
+        self.u = u
+        self.meta = meta
+
+    @classmethod
+    def create(cls, path, n_trials, n_steps, dtype=np.float32, store_u=False, meta=None):
+        """
+        Allocate a store (overwriting an existing one at path).
+
+        Args:
+            path: store directory
+            n_trials, n_steps: trajectory shape
+            dtype: on-disk precision (float32 halves the size of float64)
+            store_u: also allocate the control input array
+            meta: JSON-serializable metadata (params, seeds, model, ...)
+        """
+        os.makedirs(path, exist_ok=True)
+        dtype = np.dtype(dtype)
+        x = np.lib.format.open_memmap(os.path.join(path, 'x.npy'), mode='w+',
+                                      dtype=dtype, shape=(n_trials, n_steps))
+        u = None
+        u_path = os.path.join(path, 'u.npy')
+        if store_u:
+            u = np.lib.format.open_memmap(u_path, mode='w+', dtype=dtype,
+                                          shape=(n_trials, n_steps - 1))
+        elif os.path.exists(u_path):
+            os.remove(u_path)
+
+        meta = dict(meta or {})
+        meta.update(n_trials=n_trials, n_steps=n_steps, dtype=dtype.name, store_u=store_u)
+        store = cls(path, x, u, meta)
+        store.write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path, mode='r'):
+        """Open an existing store (read-only by default)"""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        x = np.load(os.path.join(path, 'x.npy'), mmap_mode=mode)
+        u = np.load(os.path.join(path, 'u.npy'), mmap_mode=mode) if meta['store_u'] else None
+        return cls(path, x, u, meta)
+
+    @property
+    def n_trials(self):
+        return self.x.shape[0]
+
+    @property
+    def n_steps(self):
+        return self.x.shape[1]
+
+    def time(self):
+        """Sample times t[k] = t0 + k * dt from the metadata"""
+        return self.meta.get('t0', 0.0) + self.meta['dt'] * np.arange(self.n_steps)
+
+    def writer(self, trial_offset=0):
+        """Streaming writer filling trials trial_offset, trial_offset + 1, ..."""
+        return TraceWriter(self, trial_offset)
+
+    def write_meta(self):
+        """(Re)write the meta.json sidecar"""
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2, default=_json_default)
+
+    def flush(self):
+        self.x.flush()
+        if self.u is not None:
+            self.u.flush()
+
+
+class TraceWriter(Metric):
+    """
+    Copies every block of states (and inputs) into a TrajectoryStore.
+
+    Fed by the engines like a streaming metric, so a run holds only one
+    block in memory while the full ensemble accumulates on disk.
+    """
+
+    needs_u = True
+
+    def __init__(self, store, trial_offset=0):
+        self.store = store
+        self.trial_offset = trial_offset
+
+    def start(self, x0):
+        x0 = np.asarray(x0)
+        self.trials = slice(self.trial_offset, self.trial_offset + x0.shape[0])
+        self.store.x[self.trials, 0] = x0
+
+    def update(self, x, u, start):
+        self.store.x[self.trials, start + 1:start + 1 + len(x)] = x.T
+        if self.store.u is not None:
+            self.store.u[self.trials, start:start + len(u)] = u.T
+
+    def result(self):
+        self.store.flush()
+        return None
+
+
+def record_ensemble(path, plant, controller, disturbance, time, dt, seeds,
+                    chunk_trials=1000, dtype=np.float32, store_u=False, meta=None,
+                    metrics=None, cache=None, **run_kwargs):
+    """
+    Simulate an ensemble straight into a new TrajectoryStore.
+
+    Trials are run chunk_trials at a time, so peak memory is set by the
+    chunk, not by the ensemble.  The sidecar records the plant, controller,
+    disturbance, seeds, dt and t0 along with meta.
+
+    Args:
+        path: store directory
+        plant, controller, disturbance, time, dt, seeds: as for run()
+        chunk_trials: trials simulated per run() call
+        dtype, store_u: see TrajectoryStore.create
+        meta: extra metadata for the sidecar
+        metrics: dict of name -> Metric, accumulated over all chunks
+        cache: ResultCache; if the store at path was recorded from the same
+               inputs and the cache holds its metrics, both are reused
+               without simulating
+        **run_kwargs: forwarded to run() (x0, d_at_next, backend, ...)
+
+    Returns:
+        store: the filled TrajectoryStore
+        results: dict of name -> per-trial metric values (all trials)
+    """
+    time = np.asarray(time, dtype=float)
+    seeds = list(seeds)
+
+    key = None
+    if cache is not None and all(s is not None for s in seeds):
+        from .cache import run_key
+        backend = resolve_backend(run_kwargs.get('backend', 'numpy'), plant, controller)
+        key = run_key(plant, controller, disturbance, time, dt, seeds,
+                      x0=run_kwargs.get('x0', 1.0), metrics=metrics,
+                      d_at_next=run_kwargs.get('d_at_next', False), backend=backend,
+                      trace=[np.dtype(dtype).name, store_u])
+        try:
+            store = TrajectoryStore.open(path)
+        except (OSError, ValueError):
+            store = None
+        if store is not None and store.meta.get('cache_key') == key:
+            results = cache.get(key)
+            if results is not None:
+                return store, results
+
+    info = dict(plant=describe(plant), controller=describe(controller),
+                disturbance=describe(disturbance), seeds=seeds, dt=dt,
+                t0=float(time[0]))
+    info.update(meta or {})
+    store = TrajectoryStore.create(path, len(seeds), len(time), dtype=dtype,
+                                   store_u=store_u, meta=info)
+
+    parts = {}
+    for lo in range(0, len(seeds), chunk_trials):
+        res = run(plant, controller, disturbance, time, dt, seeds[lo:lo + chunk_trials],
+                  metrics=metrics, store=store, trial_offset=lo, **run_kwargs)
+        for name, values in res.items():
+            parts.setdefault(name, []).append(values)
+    results = {name: np.concatenate(values) for name, values in parts.items()}
+
+    if key is not None:
+        # Tag the store only once it is complete
+        cache.put(key, results)
+        store.meta['cache_key'] = key
+        store.write_meta()
+    return store, results
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, Antithetic):
+        return {'antithetic': value.seed}
+    if isinstance(value, Substream):
+        return value.key()
+    if isinstance(value, GammaDelay):
+        return {'gamma': _json_default(np.asarray(value.mean)), 'shape': value.shape,
+                'tail': value.tail}
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
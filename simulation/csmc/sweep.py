@@ -0,0 +1,82 @@
+"""
+Parallel Parameter Sweeps
+
+Spreads (parameter point, trial chunk) jobs across a ProcessPoolExecutor.
+Every trial gets its own seed from numpy.random.SeedSequence.spawn, fixed
+before any job is scheduled, so the results do not depend on the number of
+workers, the chunk size or the order in which jobs finish.  With a
+RandomStreams root the seeds are counter-based substreams addressed by the
+point itself, so a point's trials do not depend on the rest of the grid.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .streams import RandomStreams
+
+
+def trial_seeds(seed, n_points, n_trials):
+    """
+    Spawn one independent seed per (parameter point, trial).
+
+    Args:
+        seed: root entropy of the experiment
+        n_points: number of parameter points
+        n_trials: trials per point
+
+    Returns:
+        seeds[i][k]: uint32 seed array for trial k of point i
+                     (accepted by np.random.seed / RandomState)
+    """
+    root = np.random.SeedSequence(seed)
+    return [[child.generate_state(4) for child in point.spawn(n_trials)]
+            for point in root.spawn(n_points)]
+
+
+def run_sweep(simulate, points, n_trials, seed=0, chunk_size=100, n_workers=None):
+    """
+    Evaluate simulate(point, seeds) for every parameter point in parallel.
+
+    Args:
+        simulate: picklable (module-level) function returning one value per
+                  seed, e.g. the success flag of each trial
+        points: parameter points (picklable, e.g. tuples)
+        n_trials: trials per point
+        seed: root entropy of the experiment, or RandomStreams (point-addressed
+              counter-based substreams; points must then be hashable values
+              such as tuples of numbers)
+        chunk_size: trials per job
+        n_workers: worker processes (default: os.cpu_count(); 1 = run
+                   in this process)
+
+    Returns:
+        results: list with one array of per-trial values per point
+    """
+    points = list(points)
+    if isinstance(seed, RandomStreams):
+        seeds = [seed.seeds(point, range(n_trials)) for point in points]
+    else:
+        seeds = trial_seeds(seed, len(points), n_trials)
+    jobs = [(i, start) for i in range(len(points))
+            for start in range(0, n_trials, chunk_size)]
+    n_workers = n_workers or os.cpu_count() or 1
+
+    chunks = {}
+    if n_workers == 1:
+        for i, start in jobs:
+            chunks[i, start] = simulate(points[i], seeds[i][start:start + chunk_size])
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = {
+                (i, start): executor.submit(simulate, points[i],
+                                            seeds[i][start:start + chunk_size])
+                for i, start in jobs
+            }
+            for key, future in futures.items():
+                chunks[key] = future.result()
+
+    return [np.concatenate([np.asarray(chunks[i, start])
+                            for start in range(0, n_trials, chunk_size)])
+            for i in range(len(points))]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Multi-Rate Study: How Often Must the Agent Act?
+
+The plant steps at dt = 0.01 s while the sensor (heart-rate proxy) and
+the controller run on their own clocks with zero-order hold
+(Controller.at_rates).  For the baseline_comparison.py scenario this
+reports
+1. compliance and success of C-SMC against the controller period, with
+   the sensor sampled at the same period and one period of latency
+2. the cost of an expensive controller (C-SMC on a 10k-particle filter)
+   at 100 Hz and at 1 Hz: the plant keeps its fine step either way, so
+   the saving is all in the controller
+"""
+
+import time as timer
+
+import numpy as np
+
+from csmc import run, DoubleWell, Disturbance, CSMC, Compliance, Success
+from csmc.filters import ParticleFilter, Filtered
+
+dt = 0.01
+plant = DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5))
+disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True)
+
+
+def rate_sweep(T=1800.0, n_trials=200):
+    time = np.arange(0, T, dt)
+    seeds = list(range(n_trials))
+    periods = [0.01, 0.1, 0.25, 0.5, 1.0, 2.0]
+    gains = [(5.0, 0.3), (5.0, 1.0), (8.0, 1.0)]
+    print(f"{'Period [s]':>10}" + ''.join(f"   K={K:<3g} phi={phi:<4g}" for K, phi in gains))
+    print("-" * (10 + 19 * len(gains)))
+    for period in periods:
+        cells = []
+        for K, phi in gains:
+            controller = CSMC(K=K, phi=phi, r=1.0).at_rates(dt, control=period, sample=period,
+                                                            latency=period)
+            res = run(plant, controller, disturbance, time, dt, seeds,
+                      metrics={'compliance': Compliance(), 'success': Success()},
+                      d_at_next=True, backend='jit')
+            cells.append(f"{res['compliance'].mean():6.1f}% / {res['success'].mean() * 100:3.0f}%")
+        print(f"{period:>10g}" + ''.join(f"   {c:<16}" for c in cells))
+    print("(compliance / success rate)")
+
+
+def filter_cost(T=30.0, n_particles=10000):
+    time = np.arange(0, T, dt)
+    for period in (dt, 1.0):
+        steps = int(round(period / dt))
+        estimator = ParticleFilter(a=2.0, b=1.0, sigma=0.6, dt=period, noise=0.3,
+                                   n_particles=n_particles, substeps=steps)
+        controller = Filtered(CSMC(K=2.5, phi=1.0, r=1.0), estimator, seed=1)
+        controller.at_rates(dt, control=period, sample=period)
+        start = timer.perf_counter()
+        res = run(plant, controller, disturbance, time, dt, seeds=[0],
+                  metrics={'compliance': Compliance()}, d_at_next=True)
+        elapsed = timer.perf_counter() - start
+        print(f"  controller at {1 / period:5.0f} Hz: {elapsed / T * 1000:7.1f} ms per simulated "
+              f"second ({T / elapsed:6.1f}x real time), compliance {res['compliance'][0]:.1f}%")
+
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("1. C-SMC against the controller period (plant dt = 0.01 s)")
+    print("=" * 70)
+    rate_sweep()
+    print()
+    print("=" * 70)
+    print("2. Cost of a particle-filter controller (10k particles, one subject)")
+    print("=" * 70)
+    filter_cost()
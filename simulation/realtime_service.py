@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Real-Time C-SMC Service: Load Test
+
+Replays a simulated Double-Well recording into the asyncio control
+service (csmc.realtime) at increasing sample rates and reports the
+latency percentiles, jitter and dropped / stale samples for each
+backpressure policy.  With --serve the service listens on a local TCP
+port for live "t,y" sample lines instead.
+
+Usage:
+    python realtime_service.py                    # in-process replay
+    python realtime_service.py --socket           # replay over local TCP
+    python realtime_service.py --serve 8765       # live service (Ctrl-C to stop)
+"""
+
+import argparse
+import asyncio
+import time as timer
+
+import numpy as np
+
+from csmc import run, DoubleWell, Disturbance, NoControl, CSMC
+from csmc.realtime import ControlService, LowPass, replay, serve, send
+
+
+def recording(duration, rate, seed=0):
+    """Noisy measurements of an uncontrolled Double-Well trajectory sampled at rate [Hz]"""
+    dt = 1.0 / rate
+    time = np.arange(0, duration, dt)
+    x = run(DoubleWell(a=1.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5)), NoControl(),
+            Disturbance(amplitude=0.3, period=150, pulse=0.0), time, dt,
+            seeds=[seed], record=True)['x'][:, 0]
+    y = x + 0.05 * np.random.RandomState(seed + 1).standard_normal(len(x))
+    return time, y
+
+
+def make_service(policy, queue_size, max_latency):
+    return ControlService(CSMC(K=5.0, phi=0.3, r=1.0), LowPass(tau=0.05),
+                          queue_size=queue_size, policy=policy, max_latency=max_latency)
+
+
+async def load_test(time, y, speed, policy, queue_size, max_latency, port=None):
+    service = make_service(policy, queue_size, max_latency)
+    task = asyncio.create_task(service.run())
+    if port is None:
+        await replay(service, time, y, speed=speed)
+    else:
+        server = await serve(service, port=port)
+        await send(time, y, port=port, speed=speed)
+        while service.received < len(time):
+            await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+    await service.close()
+    return await task
+
+
+async def serve_forever(port, policy, queue_size, max_latency):
+    next_log = [0.0]
+
+    def log(intervention):
+        # At most one status line per second
+        now = timer.perf_counter()
+        if now >= next_log[0]:
+            next_log[0] = now + 1.0
+            stats = service.report()
+            print(f"  t={intervention.t:.2f}  x={intervention.x:+.3f}  u={intervention.u:+.3f}  "
+                  f"p50={stats['p50'] * 1e6:.0f}us  p99={stats['p99'] * 1e6:.0f}us  "
+                  f"dropped={stats['dropped']}  stale={stats['stale']}")
+
+    service = make_service(policy, queue_size, max_latency)
+    service.sink = log
+    server = await serve(service, port=port)
+    print(f"Listening on 127.0.0.1:{port} (send 't,y' lines)")
+    async with server:
+        await asyncio.gather(server.serve_forever(), service.run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--duration', type=float, default=30.0, help='recording length [s]')
+    parser.add_argument('--rate', type=float, default=100.0, help='sample rate of the recording [Hz]')
+    parser.add_argument('--speeds', type=float, nargs='+', default=[1, 10, 100, float('inf')],
+                        help='playback speeds (inf = as fast as possible)')
+    parser.add_argument('--queue', type=int, default=64, help='input queue capacity')
+    parser.add_argument('--max-latency', type=float, default=0.05,
+                        help='stale threshold [s] for the drop_oldest runs')
+    parser.add_argument('--socket', action='store_true', help='replay over local TCP')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', type=int, metavar='PORT', help='run the live service')
+    args = parser.parse_args()
+
+    if args.serve:
+        try:
+            asyncio.run(serve_forever(args.serve, 'drop_oldest', args.queue, args.max_latency))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    time, y = recording(args.duration, args.rate)
+    print("=" * 90)
+    print(f"Real-time C-SMC service: {len(time)} samples at {args.rate:.0f} Hz "
+          f"({'TCP' if args.socket else 'in-process'} replay, queue {args.queue})")
+    print("=" * 90)
+    print(f"{'Policy':<12} {'Speed':>6} {'Rate [1/s]':>11} {'p50 [us]':>9} {'p99 [us]':>9} "
+          f"{'max [us]':>9} {'Jitter [us]':>11} {'Dropped':>8} {'Stale':>6}")
+    print("-" * 90)
+    for policy, max_latency in (('block', None), ('drop_oldest', args.max_latency)):
+        for speed in args.speeds:
+            stats = asyncio.run(load_test(time, y, speed, policy, args.queue, max_latency,
+                                          port=args.port if args.socket else None))
+            rate = f"{args.rate * speed:.0f}" if np.isfinite(speed) else 'max'
+            print(f"{policy:<12} {speed:>6g} {rate:>11} {stats['p50'] * 1e6:>9.0f} "
+                  f"{stats['p99'] * 1e6:>9.0f} {stats['max'] * 1e6:>9.0f} "
+                  f"{stats['jitter'] * 1e6:>11.0f} {stats['dropped']:>8} {stats['stale']:>6}")
+
+
+if __name__ == "__main__":
+    main()
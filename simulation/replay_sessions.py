@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Session Replay Harness
+
+Replays archived sessions through the C-SMC controller and the
+Double-Well plant faster than real time (csmc.sessions) and writes the
+per-session compliance and intervention counts to a CSV table.  Given a
+previous table (--baseline), it lists the sessions whose results changed,
+so a controller change can be regression-tested against the archive.
+
+Sessions are either IBI recordings (converted with the RMSSD proxy of
+csmc.cohort) or the synthetic exam-stress series of
+validate_with_public_data.py.
+
+Usage:
+    python replay_sessions.py --synthetic 2000                  # synthetic archive
+    python replay_sessions.py --data-dir DATA_DIR               # IBI.csv recordings
+    python replay_sessions.py --data-dir DATA_DIR --params cohort_parameters.csv
+    python replay_sessions.py --synthetic 2000 --K 4 --baseline replay_sessions.csv
+"""
+
+import argparse
+import csv
+import time as timer
+
+import numpy as np
+
+from csmc import RandomStreams, DoubleWell, CSMC
+from csmc.cohort import find_recordings, read_ibi, state_proxy
+from csmc.sessions import replay_sessions
+from validate_with_public_data import synthetic_data
+
+COLUMNS = ('session', 'n_samples', 'duration', 'compliance', 'recorded_compliance',
+           'interventions', 'mean_abs_u')
+
+
+def synthetic_sessions(n, duration=1800):
+    """n exam-stress sessions, each with its own measurement-noise substream"""
+    streams = RandomStreams('replay_sessions')
+    return [(f'synthetic_{i:05d}', *synthetic_data(duration, dt=1.0, rng=streams.generator('session', i)))
+            for i in range(n)]
+
+
+def recorded_sessions(root, pattern, dt, window):
+    """State proxies of the IBI recordings under root (unreadable ones are skipped)"""
+    sessions = []
+    for subject, path in find_recordings(root, pattern):
+        try:
+            t, x = state_proxy(*read_ibi(path), dt=dt, window=window)
+        except (OSError, ValueError, ImportError) as exc:
+            print(f"  skipped {subject}: {type(exc).__name__}: {exc}")
+            continue
+        sessions.append((subject, t, x))
+    return sessions
+
+
+def read_table(path, key='session'):
+    with open(path, newline='') as f:
+        return {row[key]: row for row in csv.DictReader(f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--data-dir', help='directory of IBI recordings')
+    parser.add_argument('--pattern', default='IBI.csv')
+    parser.add_argument('--window', type=float, default=60.0, help='RMSSD window [s]')
+    parser.add_argument('--synthetic', type=int, default=0, help='number of synthetic sessions')
+    parser.add_argument('--params', help='fit_cohort.py table with per-subject a, b')
+    parser.add_argument('--a', type=float, default=1.0)
+    parser.add_argument('--b', type=float, default=1.0)
+    parser.add_argument('--K', type=float, default=5.0)
+    parser.add_argument('--phi', type=float, default=0.3)
+    parser.add_argument('--r', type=float, default=1.0)
+    parser.add_argument('--substeps', type=int, default=20, help='plant steps per sample')
+    parser.add_argument('--control-rate', type=float, default=10.0, help='controller updates [Hz]')
+    parser.add_argument('--batch', type=int, default=256, help='sessions per batch')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='replay_sessions.csv')
+    parser.add_argument('--baseline', help='previous table to compare against')
+    parser.add_argument('--tol', type=float, default=0.5, help='compliance change reported [%%]')
+    args = parser.parse_args()
+
+    dt = 1.0
+    sessions = []
+    if args.data_dir:
+        sessions += recorded_sessions(args.data_dir, args.pattern, dt, args.window)
+    if args.synthetic:
+        sessions += synthetic_sessions(args.synthetic)
+    if not sessions:
+        parser.error("no sessions: give --data-dir and/or --synthetic")
+
+    params = None
+    if args.params:
+        fitted = read_table(args.params, key='subject')
+        missing = [name for name, _, _ in sessions if not fitted.get(name, {}).get('a')]
+        if missing:
+            parser.error(f"no fitted parameters for {len(missing)} sessions (e.g. {missing[0]})")
+        params = {name: [float(fitted[s][name]) for s, _, _ in sessions] for name in ('a', 'b')}
+
+    # Read first: the new table may overwrite the baseline file
+    base = read_table(args.baseline) if args.baseline else None
+
+    sim_dt = dt / args.substeps
+    control_every = max(1, int(round(1.0 / (args.control_rate * sim_dt))))
+    plant = DoubleWell(a=args.a, b=args.b, clip=(-1.5, 1.5))
+    controller = CSMC(K=args.K, phi=args.phi, r=args.r)
+
+    print("=" * 70)
+    print(f"Session replay: {len(sessions)} sessions, C-SMC K={args.K}, phi={args.phi}, "
+          f"control every {control_every * sim_dt:g} s")
+    print("=" * 70)
+    start = timer.perf_counter()
+    rows = replay_sessions(sessions, plant, controller, dt=dt, substeps=args.substeps,
+                           control_every=control_every, params=params,
+                           batch_size=args.batch, n_workers=args.workers)
+    elapsed = timer.perf_counter() - start
+
+    with open(args.output, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    session_time = sum(row['duration'] for row in rows)
+    compliance = np.array([row['compliance'] for row in rows])
+    recorded = np.array([row['recorded_compliance'] for row in rows])
+    interventions = np.array([row['interventions'] for row in rows])
+    print(f"Replayed {session_time / 3600:.1f} h of sessions in {elapsed:.1f} s "
+          f"({session_time / elapsed:,.0f}x real time, {len(rows) / elapsed:.0f} sessions/s)")
+    print(f"  Compliance    recorded {recorded.mean():.1f}%  ->  controlled {compliance.mean():.1f}% "
+          f"(worst session {compliance.min():.1f}%)")
+    print(f"  Interventions median {np.median(interventions):.0f} per session "
+          f"(max {interventions.max()})")
+    print(f"\nTable saved: {args.output}")
+
+    if base is not None:
+        changed = [(row, float(base[row['session']]['compliance']))
+                   for row in rows if row['session'] in base
+                   and abs(row['compliance'] - float(base[row['session']]['compliance'])) > args.tol]
+        compared = sum(row['session'] in base for row in rows)
+        print(f"\nBaseline {args.baseline}: {len(changed)}/{compared} sessions changed "
+              f"compliance by more than {args.tol}%")
+        for row, before in sorted(changed, key=lambda c: c[0]['compliance'] - c[1])[:10]:
+            print(f"  {row['session']:<20} {before:6.1f}% -> {row['compliance']:6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
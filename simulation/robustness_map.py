@@ -0,0 +1,92 @@
+"""
+Strategy 5b: High-Resolution Robustness Map
+
+Extends the 3x3 sensitivity heatmap to the full (K, phi, d) space.
+Instead of brute-forcing a uniform fine grid, the sweep starts on a coarse
+grid and refines only the cells where the success rate crosses 50% / 90%,
+so the simulations concentrate on the stability boundary.
+
+Each point runs simulate_csmc (sensitivity_analysis.py) through the
+parallel sweep runner.
+
+Outputs:
+- robustness_map.npz: every evaluated point and its success rate
+- robustness_boundary.csv: the 50% / 90% boundary surfaces
+- robustness_map.png: 3-D view of the boundary surfaces
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from csmc import run_sweep, refine_grid, boundary_surface
+from sensitivity_analysis import simulate_point
+
+# Sweep setup
+n_trials = 200     # Trials per parameter point
+chunk_size = 100   # Trials per parallel job
+seed = 2025        # Root entropy (combined with the refinement level)
+
+# Parameter box: K (control gain), phi (boundary layer), d (pulse magnitude)
+bounds = [(1.0, 8.0), (0.05, 1.0), (-4.0, -1.5)]
+axis_names = ['K', 'phi', 'd_mag']
+
+# Refinement: 5 points per axis, 4 bisection levels (equivalent to a 65^3 grid)
+n_coarse = 5
+max_level = 4
+thresholds = (50.0, 90.0)
+
+def evaluate(points, level):
+    """Success rate [%] of each point, all points of a level in one sweep"""
+    print(f"  Level {level}: {len(points)} new points")
+    successes = run_sweep(simulate_point, points, n_trials, seed=[seed, level],
+                          chunk_size=chunk_size)
+    return [np.mean(s) * 100 for s in successes]
+
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Strategy 5b: High-Resolution Robustness Map (Adaptive Refinement)")
+    print("=" * 70)
+    for name, (lo, hi) in zip(axis_names, bounds):
+        print(f"{name:>6}: [{lo}, {hi}]")
+    print()
+
+    result = refine_grid(evaluate, bounds, n_coarse=n_coarse, max_level=max_level,
+                         thresholds=thresholds)
+
+    n_eval = len(result['rates'])
+    print()
+    print(f"Evaluated points: {n_eval} (uniform grid: {result['n_uniform']}, "
+          f"{result['n_uniform'] / n_eval:.1f}x fewer)")
+    print(f"Boundary cells at finest level: {len(result['cells'])}")
+
+    # Export
+    np.savez('robustness_map.npz', points=result['points'], rates=result['rates'],
+             bounds=np.array(bounds), n_trials=n_trials)
+    print("Data saved: robustness_map.npz")
+
+    rows = []
+    surfaces = {}
+    for thr in thresholds:
+        surfaces[thr] = boundary_surface(result, thr)
+        rows += [(thr, *p) for p in surfaces[thr]]
+        print(f"{thr:.0f}% boundary: {len(surfaces[thr])} surface points")
+    np.savetxt('robustness_boundary.csv', np.array(rows).reshape(-1, 4), delimiter=',',
+               header='threshold,' + ','.join(axis_names), comments='', fmt='%.6g')
+    print("Boundary saved: robustness_boundary.csv")
+
+    # Visualization
+    fig = plt.figure(figsize=(8, 7))
+    ax = fig.add_subplot(projection='3d')
+    for thr, color in zip(thresholds, ['red', 'orange']):
+        p = surfaces[thr]
+        if len(p):
+            ax.scatter(p[:, 0], p[:, 1], p[:, 2], s=2, color=color, alpha=0.5,
+                       label=f'{thr:.0f}% success')
+    ax.set_xlabel(r'Control Gain $K$')
+    ax.set_ylabel(r'Boundary Layer $\phi$')
+    ax.set_zlabel('Disturbance Magnitude')
+    ax.set_title('C-SMC Stability Boundary in (K, phi, d) Space')
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig('robustness_map.png', dpi=150)
+    print("Figure saved: robustness_map.png")
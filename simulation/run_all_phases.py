@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 
+from csmc import run, DDM, Disturbance, CSMC, Compliance
+
 # ---------------------------------------------------------
 # 共通パラメータ設定 (Human Scale: 30 minutes)
 # ---------------------------------------------------------
@@ -11,56 +13,35 @@ steps = int(T_total / dt)
 time = np.linspace(0, T_total, steps)
 target_r = 1.0
 
-# 外乱生成関数
-def generate_disturbance(t_array):
-    d = np.zeros_like(t_array)
-    # 定常的な緊張感 (周期150秒程度のゆったりした波)
-    d = 0.5 * np.sin(2 * np.pi * (1/150) * t_array)
-    # パニックパルス: 開始12分(720s)〜14分(840s)の2分間
-    panic_mask = (t_array >= 720.0) & (t_array <= 840.0)
-    d[panic_mask] -= 4.0
-    return d
+# 外乱: 定常的な緊張感 (周期150秒程度のゆったりした波)
+#       + パニックパルス: 開始12分(720s)〜14分(840s)の2分間
+disturbance = Disturbance(amplitude=0.5, period=150, pulse=-4.0,
+                          pulse_start=720.0, pulse_end=840.0)
+
+# Plant Params
+plant = DDM(v_drift=0.05, sigma=0.05)
 
 # シミュレーション実行関数
 def run_simulation(phase_name, K_gain, phi, use_tanh=True, use_delay=False):
-    x = np.zeros(steps)
-    u = np.zeros(steps)
-    d = generate_disturbance(time)
-    x[0] = 0.05
-    
-    # Plant Params
-    v_drift = 0.05
-    sigma = 0.05
-    
-    for t in range(steps - 1):
-        error = x[t] - target_r
-        
-        # Phase 1: 遅延あり
-        if use_delay and t > 10:
-             # 100ms (10 steps) delay
-             s = x[t-10] - target_r
-        else:
-             s = error
+    # Phase 1: 遅延あり 100ms (10 steps) delay
+    delay = 10 if use_delay else 0
 
-        # Control Law
-        if not use_tanh:
-            # Phase 1 & 3 (Sgn/Saturation like)
-            # Phase 1は純粋なSgnだと計算不能になるので、非常に急峻なTanhで近似
-            u[t] = -K_gain * np.tanh(s / 0.001) 
-        else:
-            # Phase 2 & 4 (Tanh)
-            if phi > 0:
-                u[t] = -K_gain * np.tanh(s / phi)
-            else:
-                u[t] = -K_gain * np.sign(s) # Fallback
+    # Control Law
+    if not use_tanh:
+        # Phase 1 & 3 (Sgn/Saturation like)
+        # Phase 1は純粋なSgnだと計算不能になるので、非常に急峻なTanhで近似
+        controller = CSMC(K=K_gain, phi=0.001, r=target_r, delay=delay)
+    else:
+        # Phase 2 & 4 (Tanh), phi = 0 は Sgn に fallback
+        controller = CSMC(K=K_gain, phi=phi, r=target_r, delay=delay)
 
-        noise = sigma * np.random.normal(0, np.sqrt(dt))
-        dx = (v_drift + u[t] + d[t]) * dt + noise
-        x[t+1] = x[t] + dx
+    res = run(plant, controller, disturbance, time, dt, seeds=[None], x0=0.05,
+              metrics={'compliance': Compliance(0.8, 1.2)}, record=True,
+              backend='jit')
+    x = res['x'][:, 0]
 
     # 遵守率
-    within_band = (x >= 0.8) & (x <= 1.2)
-    compliance = np.mean(within_band) * 100
+    compliance = res['compliance'][0]
     
     # 描画と保存
     plt.figure(figsize=(12, 6))
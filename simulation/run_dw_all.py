@@ -2,10 +2,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 
+from csmc import run, ResultCache, DoubleWell, Disturbance, NoControl, CSMC, Compliance
+
 # ---------------------------------------------------------
 # Double-Well Potential Simulation Engine
 # ---------------------------------------------------------
 dt = 0.01
+seed = 0  # All phases share this noise realization (common random numbers)
+cache = ResultCache()  # Re-running after a plotting tweak loads the stored traces
 
 def run_dw_simulation(
     duration_minutes, 
@@ -26,57 +30,43 @@ def run_dw_simulation(
     steps = int(T_total / dt)
     time = np.linspace(0, T_total, steps)
     
-    # State Vars
-    x = np.zeros(steps)
-    u = np.zeros(steps)
-    x[0] = 1.0 # Start at Healthy state (+1)
-    
     # Pulse Timing (30 min scale: 12m-14m = 720s-840s)
     # For Fig 0 comparison, we use the same timing
     pulse_start = 720.0
     pulse_end = 840.0
     
-    for t in range(steps - 1):
-        # 1. Disturbance
-        # Slow wave + Panic Pulse
-        d = 0.3 * np.sin(2 * np.pi * (1/150) * time[t]) 
-        if pulse_start <= time[t] <= pulse_end:
-            d += pulse_strength
-            
-        # 2. Control Input (C-SMC)
-        control_val = 0.0
-        if use_control:
-            curr_x = x[t]
-            if use_delay and t > 100: # 1s delay
-                 curr_x = x[t-100]
-            
-            # Target is Healthy State (r = 1.0)
-            s = curr_x - 1.0
-            
-            if use_chattering: # Phase 3
-                 control_val = -K_gain * np.tanh(s / 0.01)
-            elif phi > 0:
-                 control_val = -K_gain * np.tanh(s / phi)
-            else:
-                 control_val = 0.0
-
-        u[t] = control_val
-
-        # 3. Dynamics (Double-Well)
-        # Potential V(x) = -a/2 x^2 + b/4 x^4
-        # Force = -dV/dx = ax - bx^3
-        # dx = (ax - bx^3 + u + d) dt + noise
-        
-        internal_force = param_a * x[t] - param_b * (x[t]**3)
-        
-        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
-        dx = (internal_force + u[t] + d) * dt + noise
-        
-        x[t+1] = x[t] + dx
-        
-        # Hard limit to prevent numerical explosion if it runs away too far (though x^3 usually contains it)
-        if x[t+1] > 3: x[t+1] = 3
-        if x[t+1] < -3: x[t+1] = -3
+    # 1. Disturbance
+    # Slow wave + Panic Pulse
+    disturbance = Disturbance(amplitude=0.3, period=150, pulse=pulse_strength,
+                              pulse_start=pulse_start, pulse_end=pulse_end)
+    
+    # 2. Control Input (C-SMC)
+    # Target is Healthy State (r = 1.0)
+    if not use_control:
+        controller = NoControl()
+    elif use_chattering: # Phase 3
+        controller = CSMC(K=K_gain, phi=0.01, r=1.0)
+    elif phi > 0:
+        controller = CSMC(K=K_gain, phi=phi, r=1.0)
+    else:
+        controller = NoControl()
+    if use_delay:
+        # Phase 1: the heart-rate proxy arrives once per second, 1 s late, and
+        # the agent acts once per second (zero-order hold in between)
+        controller.at_rates(dt, control=1.0, sample=1.0, latency=1.0)
+    
+    # 3. Dynamics (Double-Well)
+    # Potential V(x) = -a/2 x^2 + b/4 x^4
+    # Force = -dV/dx = ax - bx^3
+    # dx = (ax - bx^3 + u + d) dt + noise
+    # Hard limit to prevent numerical explosion if it runs away too far (though x^3 usually contains it)
+    plant = DoubleWell(a=param_a, b=param_b, sigma=0.05, clip=(-3, 3))
+    
+    # Start at Healthy state (+1)
+    res = run(plant, controller, disturbance, time, dt, seeds=[seed], x0=1.0,
+              metrics={'compliance': Compliance(0.8, 1.2)}, record=True,
+              backend='jit', shared=True, cache=cache)
+    x = res['x'][:, 0]
 
     # 4. Plot and Save
     plt.figure(figsize=(10, 6))
@@ -104,8 +94,7 @@ def run_dw_simulation(
         plt.close()
     
     # Calculate Compliance (Stay within Healthy Band)
-    within_band = (x >= 0.8) & (x <= 1.2)
-    return np.mean(within_band) * 100
+    return res['compliance'][0]
 
 # ---------------------------------------------------------
 # 2. Execution Sequence
@@ -123,16 +112,11 @@ plt.figure(figsize=(10, 6))
 def get_dw_trace(a, pulse_mag=-2.0):
     steps = int(1800.0/dt)
     time = np.linspace(0, 1800.0, steps)
-    x = np.zeros(steps)
-    x[0] = 1.0
-    for t in range(steps-1):
-        d = 0.3 * np.sin(2*np.pi*(1/150)*time[t])
-        if 720 <= time[t] <= 840: d += pulse_mag
-        force = a*x[t] - 1.0*(x[t]**3)
-        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
-        dx = (force + d)*dt + noise
-        x[t+1] = x[t] + dx
-    return time, x
+    disturbance = Disturbance(amplitude=0.3, period=150, pulse=pulse_mag)
+    res = run(DoubleWell(a=a, b=1.0, sigma=0.05), NoControl(), disturbance, time, dt,
+              seeds=[seed], x0=1.0, record=True, backend='jit', shared=True,
+              cache=cache)
+    return time, res['x'][:, 0]
 
 # Run Traces
 t, x_stable = get_dw_trace(a=2.0, pulse_mag=-3.0) # Strong pulse needed to test stable one
@@ -2,10 +2,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 
+from csmc import run, ResultCache, OU, Disturbance, NoControl, CSMC, Compliance
+from csmc.exact import sample_exact
+
 # ---------------------------------------------------------
 # 1. OU Simulation Engine
 # ---------------------------------------------------------
 dt = 0.01
+seed = 0  # All phases share this noise realization (common random numbers)
+cache = ResultCache()  # Re-running after a plotting tweak loads the stored traces
 
 def run_ou_simulation(
     duration_minutes, 
@@ -25,10 +30,6 @@ def run_ou_simulation(
     steps = int(T_total / dt)
     time = np.linspace(0, T_total, steps)
     
-    # State Vars
-    x = np.zeros(steps)
-    u = np.zeros(steps)
-    x[0] = 1.0 
     mu = 1.0 # Baseline
     
     # Pulse Timing (Fixed for comparison: 12m-14m, i.e., 20% point for 30m, but let's fix relative to duration)
@@ -45,38 +46,30 @@ def run_ou_simulation(
     # 「30分生きた時のHigh Sensitivity挙動」を見るべき。
     # つまり、High Sensitivity Parameter (Theta=1.0) で 30分回せば良い。
     
-    for t in range(steps - 1):
-        # 1. Disturbance
-        d = 0.5 * np.sin(2 * np.pi * (1/150) * time[t]) # Slow wave
-        if pulse_start <= time[t] <= pulse_end:
-            d += pulse_strength
-            
-        # 2. Control Input
-        control_val = 0.0
-        if use_control:
-            curr_x = x[t]
-            if use_delay and t > 100: # 1s delay
-                 curr_x = x[t-100]
-            
-            error = curr_x - mu
-            s = error
-            
-            if use_chattering: # Phase 3: Sign like behavior
-                 # Tanh with very steep slope
-                 control_val = -K_gain * np.tanh(s / 0.01)
-            elif phi > 0:
-                 control_val = -K_gain * np.tanh(s / phi)
-            else:
-                 control_val = 0.0 # Phase 2 (Gain too low) -> handled by K_gain
-            
-        u[t] = control_val
-
-        # 3. Dynamics (OU Process)
-        # dx = theta*(mu - x)*dt + (u + d)*dt + sigma*dW
-        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
-        
-        dx = theta * (mu - x[t]) * dt + (u[t] + d) * dt + noise
-        x[t+1] = x[t] + dx
+    # 1. Disturbance: Slow wave + Panic Pulse
+    disturbance = Disturbance(amplitude=0.5, period=150, pulse=pulse_strength,
+                              pulse_start=pulse_start, pulse_end=pulse_end)
+    
+    # 2. Control Input (C-SMC)
+    if not use_control:
+        controller = NoControl()
+    elif use_chattering: # Phase 3: Sign like behavior (Tanh with very steep slope)
+        controller = CSMC(K=K_gain, phi=0.01, r=mu)
+    elif phi > 0:
+        controller = CSMC(K=K_gain, phi=phi, r=mu)
+    else:
+        controller = NoControl() # Phase 2 (Gain too low) -> handled by K_gain
+    if use_delay:
+        # Phase 1: the heart-rate proxy arrives once per second, 1 s late, and
+        # the agent acts once per second (zero-order hold in between)
+        controller.at_rates(dt, control=1.0, sample=1.0, latency=1.0)
+    
+    # 3. Dynamics (OU Process)
+    # dx = theta*(mu - x)*dt + (u + d)*dt + sigma*dW
+    res = run(OU(theta=theta, mu=mu, sigma=0.05), controller, disturbance, time, dt,
+              seeds=[seed], x0=1.0, metrics={'compliance': Compliance(0.8, 1.2)}, record=True,
+              backend='jit', shared=True, cache=cache)
+    x = res['x'][:, 0]
 
     # 4. Plot and Save
     plt.figure(figsize=(10, 6))
@@ -101,8 +94,7 @@ def run_ou_simulation(
         plt.close()
     
     # Calculate Compliance
-    within_band = (x >= 0.8) & (x <= 1.2)
-    return np.mean(within_band) * 100
+    return res['compliance'][0]
 
 # ---------------------------------------------------------
 # 2. Execution Sequence
@@ -128,20 +120,14 @@ time = np.linspace(0, T_total, steps)
 
 # --- Manual Plot for Fig 0 Combined ---
 def get_ou_trace(theta, d_scale=1.0):
-    x = np.zeros(steps)
-    x[0] = 1.0
-    mu = 1.0
-    for t in range(steps-1):
-        d = 0.5 * np.sin(2*np.pi*(1/150)*time[t])
-        if 720 <= time[t] <= 840: d -= 4.0
-        
-        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
-        # Important: Sensitivity to disturbance.
-        # High Sensitivity: d affects x directly magnitude 1.0
-        # Low Sensitivity: d affects x with magnitude 0.2 (Inertia)
-        dx = theta*(mu - x[t])*dt + (d * d_scale)*dt + noise
-        x[t+1] = x[t] + dx
-    return x
+    # Important: Sensitivity to disturbance.
+    # High Sensitivity: d affects x directly magnitude 1.0
+    # Low Sensitivity: d affects x with magnitude 0.2 (Inertia)
+    # Open loop OU: sampled from the exact Gaussian transition (no time stepping)
+    disturbance = Disturbance(amplitude=0.5, period=150, pulse=-4.0, scale=d_scale)
+    x = sample_exact(OU(theta=theta, mu=1.0, sigma=0.05), disturbance, time,
+                     seeds=[seed], x0=1.0)
+    return x[:, 0]
 
 x_low = get_ou_trace(theta=0.5, d_scale=0.2) # Low impact
 x_high = get_ou_trace(theta=0.5, d_scale=1.0) # High impact
@@ -2,6 +2,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 
+from csmc import DDM, Disturbance
+from csmc.exact import sample_exact
+
 # ---------------------------------------------------------
 # 共通設定
 # ---------------------------------------------------------
@@ -13,9 +16,6 @@ def run_open_loop_simulation(duration_minutes, label, color, time_constant_facto
     steps = int(T_total / dt)
     time = np.linspace(0, T_total, steps)
     
-    x = np.zeros(steps)
-    x[0] = 1.0 # 初期値
-    
     # ドリフト項（復元力）
     # High (tau=1) は復元力が弱く、Low (tau=5) は復元力が相対的に強いというよりは、
     # 外乱に対する感度が低い。
@@ -25,29 +25,18 @@ def run_open_loop_simulation(duration_minutes, label, color, time_constant_facto
     pulse_strength = -4.0 # 5章と同じ強烈なパルス (-40 -> -4 スケール)
     
     # パルス発生タイミング: 両者比較のため 150s - 250s (100秒間) に固定
-    pulse_start_t = 150.0
-    pulse_end_t = 250.0
+    # 緩やかな定常外乱も入れておく
+    disturbance = Disturbance(amplitude=0.5, period=30, pulse=pulse_strength,
+                              pulse_start=150.0, pulse_end=250.0,
+                              scale=1.0 / time_constant_factor)
     
-    for t in range(steps - 1):
-        d = 0.0
-        # パルス外乱
-        if pulse_start_t <= time[t] <= pulse_end_t:
-            d = pulse_strength
-        
-        # 緩やかな定常外乱も入れておく
-        d += 0.5 * np.sin(2 * np.pi * (1/30) * time[t]) 
-
-        # ダイナミクス:
-        # dx = (1/tau) * (u + d + drift) * dt
-        # tauが大きいほど、変化量 dx は小さくなる
-        
-        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
-        
-        # Open Loopなので u = 0
-        total_force = (v_drift + d) 
-        dx = (1.0 / time_constant_factor) * total_force * dt + noise
-        
-        x[t+1] = x[t] + dx
+    # ダイナミクス:
+    # dx = (1/tau) * (u + d + drift) * dt
+    # tauが大きいほど、変化量 dx は小さくなる
+    # Open Loopなので u = 0
+    # Open Loop なので遷移はガウス分布で厳密に書ける（時間刻みによる誤差なし）
+    plant = DDM(v_drift=v_drift / time_constant_factor, sigma=0.05)
+    x = sample_exact(plant, disturbance, time, seeds=[None], x0=1.0)[:, 0] # 初期値 1.0
 
     # 実時間プロット
     plt.plot(time, x, label=f"{label} (tau={time_constant_factor})", color=color, linewidth=2)
@@ -13,11 +13,23 @@ import numpy as np
 import matplotlib.pyplot as plt
 from itertools import product
 
+from csmc import run, run_sweep, run_grid, trial_seeds, DoubleWell, Disturbance, CSMC, Success
+from csmc.fokker_planck import solve_fokker_planck
+from csmc.rare import collapse_probability
+
 # Simulation setup
 T = 1800
 dt = 0.01
 t = np.arange(0, T, dt)
-n_trials = 50  # Reduced for speed
+n_trials = 1000  # Per parameter point, spread across all cores
+chunk_size = 100  # Trials per parallel job
+seed = 2024       # Root entropy: per-trial seeds via SeedSequence.spawn
+method = 'monte_carlo'  # 'fokker_planck': one deterministic density solve per point
+                        # 'splitting': rare-event AMS, resolves collapse probabilities < 1%
+                        # 'tensor': all points x trials as one array pass (common noise)
+fp_dt = 0.05      # Time step of the Fokker-Planck solve (implicit, no sampling noise)
+ams_runs = 5      # Independent splitting runs per point (confidence interval)
+ams_particles = 100
 
 # System parameters
 a = 2.0
@@ -25,126 +37,151 @@ b = 1.0
 sigma = 0.3
 r = 1.0
 
-def disturbance(t_val, d_magnitude=-2.5):
-    if 720 <= t_val <= 840:
-        return d_magnitude
-    else:
-        return 0.2 * np.sin(2 * np.pi * t_val / 300)
+plant = DoubleWell(a=a, b=b, sigma=sigma, clip=(-1.5, 1.5))
 
-def csmc_control(x, K, phi):
-    s = x - r
-    u = -K * np.tanh(s / phi)
-    return u
+def simulate_csmc_trials(K, phi, d_mag, trial_indices):
+    """Run all trials with given parameters at once (batch engine)"""
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=d_mag, replace_wave=True)
+    res = run(plant, CSMC(K=K, phi=phi, r=r), disturbance, t, dt,
+              seeds=list(trial_indices), metrics={'success': Success()}, d_at_next=True,
+              backend='jit')
+    return res['success']
 
 def simulate_csmc(K, phi, d_mag, trial_idx=0):
     """Run single trial with given parameters"""
-    np.random.seed(trial_idx)
-    x = np.ones(len(t))
-    
-    for i in range(1, len(t)):
-        t_val = t[i]
-        u = csmc_control(x[i-1], K, phi)
-        d = disturbance(t_val, d_mag)
-        
-        drift = a * x[i-1] - b * (x[i-1] ** 3)
-        noise = sigma * np.random.randn() * np.sqrt(dt)
-        
-        x[i] = x[i-1] + (drift + u + d) * dt + noise
-        x[i] = np.clip(x[i], -1.5, 1.5)
-    
-    success = np.all(x > 0)
-    return success
+    return simulate_csmc_trials(K, phi, d_mag, [trial_idx])[0]
+
+def simulate_point(point, seeds):
+    """Sweep job: one chunk of trials at parameter point (K, phi, d_mag)"""
+    K, phi, d_mag = point
+    return simulate_csmc_trials(K, phi, d_mag, seeds)
+
+def success_rate_fp(K, phi, d_mag):
+    """Success rate [%] from the Fokker-Planck density, absorbing at the tipping point"""
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=d_mag, replace_wave=True)
+    res = solve_fokker_planck(plant, CSMC(K=K, phi=phi, r=r), disturbance,
+                              np.arange(0, T + fp_dt / 2, fp_dt), absorbing=True,
+                              d_at_next=True, n_cells=300)
+    return res['success']
+
+def success_rate_ams(K, phi, d_mag, seed=seed):
+    """Success rate [%] from the splitting estimate of the collapse probability"""
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=d_mag, replace_wave=True)
+    res = collapse_probability(plant, CSMC(K=K, phi=phi, r=r), disturbance, t, dt,
+                               n_runs=ams_runs, n_particles=ams_particles, seed=seed,
+                               d_at_next=True)
+    bound = '' if res['converged'] else ' (upper bound)'
+    print(f"  K={K:.1f}, phi={phi:.1f}, d={d_mag:.1f}: P(collapse) = {res['p']:.2e} "
+          f"[{res['ci'][0]:.2e}, {res['ci'][1]:.2e}]{bound}, cost {res['cost']:.0f} trajectories")
+    return (1 - res['p']) * 100
+
+def success_rates_tensor(points, seed):
+    """Success rate [%] of every point from one (points x trials) tensor run"""
+    K, phi, d_mag = (list(values) for values in zip(*points))
+    disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True)
+    res = run_grid(plant, CSMC(r=r), disturbance, t, dt, trial_seeds(seed, 1, n_trials)[0],
+                   {'K': K, 'phi': phi, 'pulse': d_mag}, metrics={'success': Success()},
+                   d_at_next=True)
+    return list(res['success'].mean(axis=1) * 100)
+
+def success_rates(points, seed):
+    """Success rate [%] of every (K, phi, d_mag) point with the selected method"""
+    if method == 'fokker_planck':
+        return [success_rate_fp(*point) for point in points]
+    if method == 'splitting':
+        return [success_rate_ams(*point, seed=seed) for point in points]
+    if method == 'tensor':
+        return success_rates_tensor(points, seed)
+    successes = run_sweep(simulate_point, points, n_trials, seed=seed, chunk_size=chunk_size)
+    return [np.mean(s) * 100 for s in successes]
 
 # Parameter ranges
 K_values = [3.0, 5.0, 7.0]
 phi_values = [0.2, 0.3, 0.4]
 d_values = [-2.0, -2.5, -3.0]
 
-print("=" * 70)
-print("Strategy 5: Sensitivity Analysis")
-print("=" * 70)
+if __name__ == "__main__":
+    print("=" * 70)
+    print("Strategy 5: Sensitivity Analysis")
+    print("=" * 70)
+
+    # Experiment 1: Vary K and phi (fixed d=-2.5)
+    print("\n[1] K vs phi Sensitivity (fixed disturbance = -2.5)")
+    print("-" * 70)
 
-# Experiment 1: Vary K and phi (fixed d=-2.5)
-print("\n[1] K vs phi Sensitivity (fixed disturbance = -2.5)")
-print("-" * 70)
+    K_phi_results = np.zeros((len(K_values), len(phi_values)))
 
-K_phi_results = np.zeros((len(K_values), len(phi_values)))
+    K_phi_points = [(K, phi, -2.5) for K, phi in product(K_values, phi_values)]
+    K_phi_rates = success_rates(K_phi_points, seed)
 
-for i, K in enumerate(K_values):
-    for j, phi in enumerate(phi_values):
-        successes = []
-        for trial in range(n_trials):
-            success = simulate_csmc(K, phi, -2.5, trial)
-            successes.append(success)
-        success_rate = np.mean(successes) * 100
+    for (K, phi, _), success_rate in zip(K_phi_points, K_phi_rates):
+        i, j = K_values.index(K), phi_values.index(phi)
         K_phi_results[i, j] = success_rate
         print(f"K={K:.1f}, phi={phi:.1f}: Success Rate = {success_rate:.1f}%")
 
-# Experiment 2: Vary disturbance magnitude (fixed K=5.0, phi=0.3)
-print("\n[2] Disturbance Robustness (K=5.0, phi=0.3)")
-print("-" * 70)
-
-d_results = []
-for d_mag in d_values:
-    successes = []
-    for trial in range(n_trials):
-        success = simulate_csmc(5.0, 0.3, d_mag, trial)
-        successes.append(success)
-    success_rate = np.mean(successes) * 100
-    d_results.append(success_rate)
-    print(f"Disturbance = {d_mag:.1f}: Success Rate = {success_rate:.1f}%")
-
-# Visualization
-fig = plt.figure(figsize=(14, 5))
-
-# Plot 1: Heatmap of K vs phi
-ax1 = fig.add_subplot(1, 2, 1)
-im = ax1.imshow(K_phi_results, cmap='RdYlGn', vmin=0, vmax=100, aspect='auto')
-ax1.set_xticks(range(len(phi_values)))
-ax1.set_yticks(range(len(K_values)))
-ax1.set_xticklabels([f'{p:.1f}' for p in phi_values])
-ax1.set_yticklabels([f'{k:.1f}' for k in K_values])
-ax1.set_xlabel(r'Boundary Layer $\phi$')
-ax1.set_ylabel(r'Control Gain $K$')
-ax1.set_title('Success Rate (%) vs. Parameters')
-
-# Add text annotations
-for i in range(len(K_values)):
-    for j in range(len(phi_values)):
-        text = ax1.text(j, i, f'{K_phi_results[i, j]:.0f}',
-                       ha="center", va="center", color="black", fontsize=12, fontweight='bold')
-
-plt.colorbar(im, ax=ax1, label='Success Rate (%)')
-
-# Plot 2: Disturbance robustness
-ax2 = fig.add_subplot(1, 2, 2)
-ax2.bar([f'{d:.1f}' for d in d_values], d_results, color=['green', 'orange', 'red'], alpha=0.7)
-ax2.set_xlabel('Disturbance Magnitude')
-ax2.set_ylabel('Success Rate (%)')
-ax2.set_title('Robustness to Varying Disturbance Strength')
-ax2.set_ylim(0, 105)
-ax2.grid(axis='y', alpha=0.3)
-
-# Add value labels
-for i, (d, rate) in enumerate(zip(d_values, d_results)):
-    ax2.text(i, rate + 2, f'{rate:.1f}%', ha='center', fontsize=11, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('sensitivity_analysis.png', dpi=150)
-print("\nFigure saved: sensitivity_analysis.png")
-
-# Summary statistics
-print("\n" + "=" * 70)
-print("SUMMARY")
-print("=" * 70)
-print(f"Optimal parameters (K=5.0, phi=0.3): {K_phi_results[1, 1]:.1f}% success")
-print(f"Parameter range with >90% success:")
-print(f"  K: {K_values[0]:.1f} - {K_values[-1]:.1f}")
-print(f"  phi: {phi_values[0]:.1f} - {phi_values[-1]:.1f}")
-print(f"\nRobustness to extreme disturbances (d=-3.0): {d_results[2]:.1f}%")
-print("=" * 70)
-
-print("\nConclusion:")
-print("C-SMC maintains high performance (>85%) across a WIDE parameter space,")
-print("demonstrating that the '99.9%' result is NOT due to overfitting,")
-print("but reflects genuine algorithmic robustness.")
+    # Experiment 2: Vary disturbance magnitude (fixed K=5.0, phi=0.3)
+    print("\n[2] Disturbance Robustness (K=5.0, phi=0.3)")
+    print("-" * 70)
+
+    d_points = [(5.0, 0.3, d_mag) for d_mag in d_values]
+    d_rates = success_rates(d_points, seed + 1)
+
+    d_results = []
+    for d_mag, success_rate in zip(d_values, d_rates):
+        d_results.append(success_rate)
+        print(f"Disturbance = {d_mag:.1f}: Success Rate = {success_rate:.1f}%")
+
+    # Visualization
+    fig = plt.figure(figsize=(14, 5))
+
+    # Plot 1: Heatmap of K vs phi
+    ax1 = fig.add_subplot(1, 2, 1)
+    im = ax1.imshow(K_phi_results, cmap='RdYlGn', vmin=0, vmax=100, aspect='auto')
+    ax1.set_xticks(range(len(phi_values)))
+    ax1.set_yticks(range(len(K_values)))
+    ax1.set_xticklabels([f'{p:.1f}' for p in phi_values])
+    ax1.set_yticklabels([f'{k:.1f}' for k in K_values])
+    ax1.set_xlabel(r'Boundary Layer $\phi$')
+    ax1.set_ylabel(r'Control Gain $K$')
+    ax1.set_title('Success Rate (%) vs. Parameters')
+
+    # Add text annotations
+    for i in range(len(K_values)):
+        for j in range(len(phi_values)):
+            text = ax1.text(j, i, f'{K_phi_results[i, j]:.0f}',
+                           ha="center", va="center", color="black", fontsize=12, fontweight='bold')
+
+    plt.colorbar(im, ax=ax1, label='Success Rate (%)')
+
+    # Plot 2: Disturbance robustness
+    ax2 = fig.add_subplot(1, 2, 2)
+    ax2.bar([f'{d:.1f}' for d in d_values], d_results, color=['green', 'orange', 'red'], alpha=0.7)
+    ax2.set_xlabel('Disturbance Magnitude')
+    ax2.set_ylabel('Success Rate (%)')
+    ax2.set_title('Robustness to Varying Disturbance Strength')
+    ax2.set_ylim(0, 105)
+    ax2.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for i, (d, rate) in enumerate(zip(d_values, d_results)):
+        ax2.text(i, rate + 2, f'{rate:.1f}%', ha='center', fontsize=11, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig('sensitivity_analysis.png', dpi=150)
+    print("\nFigure saved: sensitivity_analysis.png")
+
+    # Summary statistics
+    print("\n" + "=" * 70)
+    print("SUMMARY")
+    print("=" * 70)
+    print(f"Optimal parameters (K=5.0, phi=0.3): {K_phi_results[1, 1]:.1f}% success")
+    print(f"Parameter range with >90% success:")
+    print(f"  K: {K_values[0]:.1f} - {K_values[-1]:.1f}")
+    print(f"  phi: {phi_values[0]:.1f} - {phi_values[-1]:.1f}")
+    print(f"\nRobustness to extreme disturbances (d=-3.0): {d_results[2]:.1f}%")
+    print("=" * 70)
+
+    print("\nConclusion:")
+    print("C-SMC maintains high performance (>85%) across a WIDE parameter space,")
+    print("demonstrating that the '99.9%' result is NOT due to overfitting,")
+    print("but reflects genuine algorithmic robustness.")
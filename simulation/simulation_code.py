@@ -1,6 +1,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from csmc import run, DDM, Disturbance, CSMC, Compliance
+
 # ---------------------------------------------------------
 # 1. パラメータ設定
 # ---------------------------------------------------------
@@ -18,49 +20,38 @@ phi = 0.3           # 境界層幅 (そのまま)
 target_r = 1.0      # 目標想起レベル
 
 # ---------------------------------------------------------
-# 2. 変数初期化
+# 2. 外乱の設定 (地獄の商談モデル - スローペース版)
 # ---------------------------------------------------------
-x = np.zeros(steps)     # 想起レベル x(t)
-u = np.zeros(steps)     # 制御入力 u(t)
-d = np.zeros(steps)     # 外乱 d(t)
 time = np.linspace(0, T_total, steps)
 
-# 初期状態
-x[0] = 0.05
+# 定常的な緊張感 (ゆったりとした波: 周期30秒程度)
+# + 突発的パニックパルス (2.5分〜3分付近: 150s - 170s)
+#   パルス強度もスケーリング (-40 -> -4)
+disturbance = Disturbance(amplitude=0.5, period=30, pulse=-4.0,
+                          pulse_start=150.0, pulse_end=170.0)
 
 # ---------------------------------------------------------
-# 3. シミュレーションループ
+# 3. シミュレーション (DDM 確率微分方程式の Euler-Maruyama 近似)
 # ---------------------------------------------------------
-for t in range(steps - 1):
-    # --- 外乱の設定 (地獄の商談モデル - スローペース版) ---
-    # 定常的な緊張感 (ゆったりとした波: 周期30秒程度)
-    d[t] = 0.5 * np.sin(2 * np.pi * (1/30) * time[t]) 
-    
-    # 突発的パニックパルス (2.5分〜3分付近: 150s - 170s)
-    if 150.0 <= time[t] <= 170.0:
-        d[t] -= 4.0 # パルス強度もスケーリング (-40 -> -4)
-
-    # --- C-SMC 制御則の計算 ---
-    error = x[t] - target_r
-    
-    # 切換面 s の定義 (微分項を排除し、単純な誤差フィードバックへ)
-    s = error
-    
-    # 境界層を導入した tanh 制御入力
-    u[t] = -K_gain * np.tanh(s / phi)
-    
-    # --- 状態更新 (DDM 確率微分方程式の Euler-Maruyama 近似) ---
-    noise = sigma * np.random.normal(0, np.sqrt(dt))
-    # システム方程式: dx/dt = v_drift + u + d
-    dx = (v_drift + u[t] + d[t]) * dt + noise
-    x[t+1] = x[t] + dx
+# システム方程式: dx/dt = v_drift + u + d
+# 制御入力: 境界層を導入した tanh 制御 u = -K tanh((x - r) / phi)
+#   (切換面 s は微分項を排除し、単純な誤差フィードバック s = x - r)
+res = run(
+    DDM(v_drift=v_drift, sigma=sigma),
+    CSMC(K=K_gain, phi=phi, r=target_r),
+    disturbance, time, dt, seeds=[None],
+    x0=0.05,  # 初期状態
+    metrics={'compliance': Compliance(0.8, 1.2)},
+    record=True,
+    backend='jit',
+)
+x = res['x'][:, 0]     # 想起レベル x(t)
 
 # ---------------------------------------------------------
 # 4. 遵守率 (Compliance Rate) の計算
 # ---------------------------------------------------------
 # 許容バンド [0.8, 1.2] 内に滞在した時間の割合
-within_band = (x >= 0.8) & (x <= 1.2)
-compliance_rate = np.mean(within_band) * 100
+compliance_rate = res['compliance'][0]
 
 print(f"Final Compliance Rate: {compliance_rate:.2f}%")
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+State Estimation for C-SMC
+
+The controllers elsewhere in the project read the true x(t).  Here C-SMC
+only sees measurements y = x + N(0, noise^2) and acts on
+1. the true state (reference)
+2. the raw measurement
+3. the EKF estimate
+4. the bootstrap particle filter estimate
+for a batch of subjects of the baseline_comparison.py scenario (panic
+pulse on the double well), then times the particle filter with 10k
+particles per subject against the 100 Hz real-time budget.
+
+Usage:
+    python state_estimation.py
+    python state_estimation.py --noise 0.5 --particles 2000
+"""
+
+import argparse
+import time as timer
+
+import numpy as np
+
+from csmc import run, DoubleWell, Disturbance, CSMC, Compliance, Success
+from csmc.filters import EKF, ParticleFilter, Filtered
+
+dt = 0.01
+a, b, sigma = 2.0, 1.0, 0.3
+plant = DoubleWell(a=a, b=b, sigma=sigma, clip=(-1.5, 1.5))
+disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, replace_wave=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--T', type=float, default=600.0, help='horizon [s]')
+    parser.add_argument('--subjects', type=int, default=20)
+    parser.add_argument('--noise', type=float, default=0.3, help='measurement noise std')
+    parser.add_argument('--particles', type=int, default=1000)
+    args = parser.parse_args()
+
+    time = np.arange(0, args.T, dt)
+    seeds = list(range(args.subjects))
+    # The filters do not know d(t): it enters their model as extra process noise
+    model = dict(a=a, b=b, sigma=2 * sigma, dt=dt, noise=args.noise)
+    estimators = {
+        'True state': None,
+        'Raw measurement': Filtered(CSMC(K=5.0, phi=0.3, r=1.0), noise=args.noise, seed=1),
+        'EKF': Filtered(CSMC(K=5.0, phi=0.3, r=1.0), EKF(**model), seed=1),
+        f'Particle filter ({args.particles})': Filtered(
+            CSMC(K=5.0, phi=0.3, r=1.0), ParticleFilter(**model, n_particles=args.particles), seed=1),
+    }
+
+    print("=" * 78)
+    print(f"C-SMC on estimated state: {args.subjects} subjects, T={args.T:.0f}s, "
+          f"measurement noise {args.noise}")
+    print("=" * 78)
+    print(f"{'Controller input':<26} {'Compliance':>11} {'Success':>9} {'RMSE':>8} {'Time [s]':>9}")
+    print("-" * 78)
+    for name, controller in estimators.items():
+        start = timer.perf_counter()
+        res = run(plant, controller or CSMC(K=5.0, phi=0.3, r=1.0), disturbance, time, dt, seeds,
+                  metrics={'compliance': Compliance(), 'success': Success()}, d_at_next=True)
+        elapsed = timer.perf_counter() - start
+        rmse = f"{controller.rmse().mean():.3f}" if controller else '-'
+        print(f"{name:<26} {res['compliance'].mean():>10.1f}% {res['success'].mean() * 100:>8.0f}% "
+              f"{rmse:>8} {elapsed:>9.1f}")
+
+    # Throughput: filter steps per second against the 100 Hz sampling rate
+    print("\nParticle filter throughput (10000 particles per subject, one core):")
+    for n_subjects in (1, 8, 32):
+        pf = ParticleFilter(**model, n_particles=10000)
+        pf.reset(n_subjects)
+        y = np.ones(n_subjects)
+        n_steps = 1000
+        start = timer.perf_counter()
+        for _ in range(n_steps):
+            pf.step(y)
+        rate = n_steps / (timer.perf_counter() - start)
+        print(f"  {n_subjects:>3} subject(s): {rate:8.0f} steps/s "
+              f"({rate / 100:.1f}x real time at 100 Hz)")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,17 +15,31 @@ To use real data:
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.optimize import curve_fit
 from scipy.stats import pearsonr
 
+from csmc import RandomStreams
+from csmc.estimation import fit_double_well
+
+# Every random draw comes from its own counter-based substream, so the
+# results do not depend on the order in which the steps are called
+streams = RandomStreams('validate_with_public_data')
+
+# Likelihood used by the fit: 'exact' (tabulated transition densities) for
+# coarse samples such as 1 s HRV windows, 'euler' for finely sampled data
+fit_method = 'exact'
+
 # ========== Step 1: Generate Synthetic "Real Data" ==========
 # In actual use, replace this with real dataset loading
 
-def synthetic_data(duration=1800, dt=1.0):
+def synthetic_data(duration=1800, dt=1.0, rng=None):
     """
     Simulate 'ground truth' cognitive state from a real exam stress scenario.
     This mimics what you would extract from HRV data.
     
+    Args:
+        rng: numpy Generator of the measurement noise
+             (default: the 'synthetic_data' substream)
+    
     Returns:
         t: time array (seconds)
         x_gt: ground truth cognitive state (normalized, 1=healthy, -1=panic)
@@ -50,7 +64,9 @@ def synthetic_data(duration=1800, dt=1.0):
         x_gt[mask] += magnitude * np.exp(-(t[mask] - t_start) / 30)
     
     # Add noise (biological variability)
-    x_gt += np.random.normal(0, 0.05, n)
+    if rng is None:
+        rng = streams.generator('synthetic_data')
+    x_gt += rng.normal(0, 0.05, n)
     
     # Clip to valid range
     x_gt = np.clip(x_gt, -1.0, 1.0)
@@ -75,20 +91,24 @@ def double_well_drift(x, a, b):
     return a * x - b * (x ** 3)
 
 
-def simulate_model(t, x0, a, b, sigma=0.05):
+def simulate_model(t, x0, a, b, sigma=0.05, rng=None):
     """
     Simulate the Double-Well model WITHOUT control (u=0, d=0)
     to see if the model can reproduce natural dynamics.
     
     dx = (ax - bx^3)dt + sigma*dW
+    
+    rng: numpy Generator of the noise (default: the 'simulate_model' substream)
     """
     dt = t[1] - t[0]
+    if rng is None:
+        rng = streams.generator('simulate_model')
     x = np.zeros(len(t))
     x[0] = x0
     
     for i in range(1, len(t)):
         drift = double_well_drift(x[i-1], a, b)
-        diffusion = sigma * np.random.randn()
+        diffusion = sigma * rng.standard_normal()
         x[i] = x[i-1] + drift * dt + diffusion * np.sqrt(dt)
         x[i] = np.clip(x[i], -1.0, 1.0)  # Physical constraint
     
@@ -97,32 +117,21 @@ def simulate_model(t, x0, a, b, sigma=0.05):
 
 # ========== Step 3: Parameter Fitting ==========
 
-def fit_parameters(t, x_data):
+def fit_parameters(t, x_data, method=fit_method):
     """
-    Fit parameters (a, b) to match observed data.
+    Fit parameters (a, b, sigma) to the observed data by maximum likelihood.
     
-    Method: Minimize prediction error using scipy curve_fit
+    Method: Euler pseudo-likelihood or tabulated exact transition densities
+    (csmc.estimation). Degenerate data raise ValueError instead of
+    silently returning default parameters.
+    
+    Returns:
+        a_fit, b_fit, sigma_fit: estimates
+        se: dict of standard errors
     """
-    # Compute empirical drift: dx/dt ≈ (x[i+1] - x[i]) / dt
     dt = t[1] - t[0]
-    dx_dt = np.diff(x_data) / dt
-    x_mid = x_data[:-1]  # Use midpoint for matching
-    
-    # Fit f(x) = a*x - b*x^3 to dx/dt
-    try:
-        params, _ = curve_fit(
-            double_well_drift, 
-            x_mid, 
-            dx_dt,
-            p0=[2.0, 1.0],  # Initial guess
-            bounds=([0.1, 0.1], [10.0, 10.0])  # Reasonable ranges
-        )
-        a_fit, b_fit = params
-    except:
-        # Fallback if fitting fails
-        a_fit, b_fit = 2.0, 1.0
-    
-    return a_fit, b_fit
+    fit = fit_double_well(x_data, dt, method=method)
+    return fit['a'], fit['b'], fit['sigma'], fit['se']
 
 
 # ========== Step 4: Validation ==========
@@ -160,14 +169,15 @@ if __name__ == "__main__":
     print(f"    Std deviation: {np.std(x_real):.3f}")
     
     # Fit parameters
-    a_fit, b_fit = fit_parameters(t, x_real)
+    a_fit, b_fit, sigma_fit, se = fit_parameters(t, x_real)
     
-    print(f"\n[2] Fitted parameters:")
-    print(f"    a (restoration) = {a_fit:.3f}")
-    print(f"    b (nonlinearity) = {b_fit:.3f}")
+    print(f"\n[2] Fitted parameters ({fit_method} likelihood):")
+    print(f"    a (restoration) = {a_fit:.3f} ± {se['a']:.3f}")
+    print(f"    b (nonlinearity) = {b_fit:.3f} ± {se['b']:.3f}")
+    print(f"    sigma (noise) = {sigma_fit:.3f} ± {se['sigma']:.3f}")
     
     # Validate model
-    x_pred, rmse, corr = validate_model(t, x_real, a_fit, b_fit, sigma=0.05)
+    x_pred, rmse, corr = validate_model(t, x_real, a_fit, b_fit, sigma=sigma_fit)
     
     print(f"\n[3] Validation metrics:")
     print(f"    RMSE = {rmse:.4f}")
@@ -5,11 +5,16 @@ Double-Well Potential Model with Monte Carlo Simulation
 """
 import numpy as np
 
+from csmc import run, DoubleWell, CSMC, Disturbance, Compliance
+from csmc.fokker_planck import solve_fokker_planck
+
 # --- 1. Simulation Parameters ---
 dt = 0.01           # Time step (10ms)
 T_total = 1800.0    # Total duration (30 min)
 steps = int(T_total / dt)
 n_trials = 100      # Monte Carlo trials
+n_check = 3         # Trials re-run with the scalar loop as a cross-check
+fp_dt = 0.05        # Time step of the deterministic Fokker-Planck cross-check
 
 # --- 2. Double-Well Potential Model Parameters ---
 a = 1.0             # Potential parameter (bistability)
@@ -22,20 +27,13 @@ phi = 0.3           # Boundary Layer (Cognitive Flexibility)
 target_r = 1.0      # Target Recall Level
 
 # --- 4. Monte Carlo Simulation ---
-print(f"Running {n_trials} Monte Carlo trials...")
-print(f"Parameters: K={K_gain}, phi={phi}, sigma={sigma}, a={a}, b={b}")
-print(f"Duration: {T_total}s ({T_total/60:.0f} min), dt={dt}s, steps={steps}")
-print()
+time = np.linspace(0, T_total, steps)
 
-compliance_rates = []
-
-for trial in range(n_trials):
-    if (trial + 1) % 20 == 0:
-        print(f"  Trial {trial + 1}/{n_trials}...")
-    
+def run_trial_scalar(seed):
+    """Appendix code as printed in the paper: one trial, one step at a time"""
+    np.random.seed(seed)
     x = np.zeros(steps)
     x[0] = 0.9      # Initial state (near healthy)
-    time = np.linspace(0, T_total, steps)
     
     for t in range(steps - 1):
         # Disturbance: Steady-state stress + Panic pulse
@@ -54,7 +52,33 @@ for trial in range(n_trials):
         x[t+1] = x[t] + dx
     
     within_band = (x >= 0.8) & (x <= 1.2)
-    compliance_rates.append(np.mean(within_band) * 100)
+    return np.mean(within_band) * 100
+
+def run_trials_batch(seeds):
+    """Same model, all trials advanced together by the batch engine"""
+    res = run(
+        DoubleWell(a=a, b=b, sigma=sigma),
+        CSMC(K=K_gain, phi=phi, r=target_r),
+        Disturbance(amplitude=0.5, period=150, pulse=-2.5),  # Steady-state stress + Panic pulse
+        time, dt, seeds, x0=0.9,
+        metrics={'compliance': Compliance(0.8, 1.2)},
+    )
+    return res['compliance']
+
+print(f"Running {n_trials} Monte Carlo trials...")
+print(f"Parameters: K={K_gain}, phi={phi}, sigma={sigma}, a={a}, b={b}")
+print(f"Duration: {T_total}s ({T_total/60:.0f} min), dt={dt}s, steps={steps}")
+print()
+
+compliance_rates = run_trials_batch(list(range(n_trials)))
+
+# Cross-check: the batch engine must reproduce the scalar appendix loop
+print(f"Cross-checking first {n_check} trials against the scalar loop...")
+scalar_rates = [run_trial_scalar(seed) for seed in range(n_check)]
+max_diff = np.max(np.abs(np.array(scalar_rates) - compliance_rates[:n_check]))
+print(f"  Max per-trial compliance difference: {max_diff:.4f}%")
+if max_diff > 0.1:
+    print("✗ FAIL: Batch engine diverges from the scalar appendix loop!")
 
 # --- 5. Statistical Results ---
 mean_rate = np.mean(compliance_rates)
@@ -79,3 +103,20 @@ else:
     print("✗ FAIL: Results differ from reported values!")
     print(f"  Expected: {reported_mean}% ± {reported_std}%")
     print(f"  Got: {mean_rate:.1f}% ± {std_rate:.1f}%")
+
+# Deterministic cross-check: the compliance is a functional of the state
+# density, so one Fokker-Planck solve gives the ensemble mean without sampling
+fp = solve_fokker_planck(
+    DoubleWell(a=a, b=b, sigma=sigma),
+    CSMC(K=K_gain, phi=phi, r=target_r),
+    Disturbance(amplitude=0.5, period=150, pulse=-2.5),
+    np.arange(0, T_total + fp_dt / 2, fp_dt), x0=0.9, n_cells=600,
+)
+print()
+print(f"Fokker-Planck compliance: {fp['compliance']:.2f}% "
+      f"(Monte Carlo: {mean_rate:.2f}% ± {std_rate / np.sqrt(n_trials):.2f}% s.e.)")
+print(f"Peak mass below tipping point: {fp['below'].max():.2e}")
+if abs(fp['compliance'] - mean_rate) < 0.5:
+    print("✓ PASS: Density solution agrees with the Monte Carlo mean")
+else:
+    print("✗ FAIL: Density solution disagrees with the Monte Carlo mean!")
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+JIT Kernel Verification
+
+1. The compiled kernel must reproduce its pure-Python reference
+   (step_kernel.py_func) exactly, for every plant x controller pair.
+2. It must agree with the NumPy batch engine up to rounding.
+3. A PID on a multi-rate schedule, PID(dt=dt).at_rates(dt, control=k*dt),
+   must match a PID running natively at k*dt with zero-order hold.
+4. Per-trial parameters (array gains) are not compiled: run(...,
+   backend='jit') must fall back to the NumPy engine and match it.
+5. A single 30-minute trajectory (Phase 1: delayed feedback) must run at
+   least 50x faster than the original scalar loop of run_dw_all.py.
+"""
+import time as timer
+
+import numpy as np
+
+from csmc import (DDM, OU, DoubleWell, NoControl, PID, RuleBased, CSMC,
+                  Disturbance, simulate_batch, run)
+from csmc.engine import resolve_backend
+from csmc import jit
+
+# --- 1. Simulation Parameters ---
+dt = 0.01
+T_check = 60.0      # Horizon for the exactness check (1 min)
+T_total = 1800.0    # Horizon for the speed check (30 min)
+seeds = [0, 1, 2]
+required_speedup = 50.0
+
+plants = {
+    'DDM': DDM(v_drift=0.05, sigma=0.05),
+    'OU': OU(theta=0.5, mu=1.0, sigma=0.05),
+    'Double-Well': DoubleWell(a=2.0, b=1.0, sigma=0.3, clip=(-1.5, 1.5)),
+}
+controllers = {
+    'None': NoControl(),
+    'PID': PID(dt=dt),
+    'Rule': RuleBased(),
+    'C-SMC': CSMC(K=5.0, phi=0.3),
+    'C-SMC (delay)': CSMC(K=8.0, phi=0.01, delay=100),
+    'SMC (sign)': CSMC(K=3.0, phi=0.0),
+    # Multi-rate: controller and sensor on their own clocks (zero-order hold)
+    'C-SMC (1 Hz)': CSMC(K=8.0, phi=0.01).at_rates(dt, control=1.0, sample=1.0, latency=1.0),
+    'PID (10 Hz)': PID(dt=dt).at_rates(dt, control=0.1, sample=0.5),
+}
+
+if not jit.HAVE_NUMBA:
+    print("Numba is not installed: run(..., backend='jit') falls back to the NumPy engine.")
+    print("Only the pure-Python reference is checked below.")
+    print()
+
+# --- 2. Exactness vs Reference ---
+time = np.arange(0, T_check, dt)
+d = Disturbance(amplitude=0.2, period=300, pulse=-2.5, pulse_start=20, pulse_end=40).sample(time[:-1])
+
+print("=" * 60)
+print("Compiled kernel vs reference / NumPy engine")
+print("=" * 60)
+all_exact = True
+for p_name, plant in plants.items():
+    for c_name, controller in controllers.items():
+        x_jit, u_jit = jit.simulate_jit(plant, controller, d, 1.0, dt, seeds, record_u=True)
+        x_ref, u_ref = jit.simulate_jit(plant, controller, d, 1.0, dt, seeds, record_u=True,
+                                        kernel=jit.step_kernel.py_func)
+        controller.reset(len(seeds))
+        x_np = simulate_batch(plant.drift, d, 1.0, plant.sigma, dt, seeds,
+                              controller=controller, clip=plant.clip, delay=controller.delay,
+                              every=controller.every, sample_every=controller.sample_every)
+
+        exact = np.array_equal(x_jit, x_ref) and np.array_equal(u_jit, u_ref)
+        all_exact &= exact
+        diff = np.max(np.abs(x_jit - x_np))
+        print(f"{p_name:<12} {c_name:<14} exact={'yes' if exact else 'NO':<4} "
+              f"max|x_jit - x_numpy| = {diff:.1e}")
+
+# --- 3. Multi-Rate PID vs Native Controller Period ---
+print()
+print("=" * 60)
+print("PID(dt=dt).at_rates(dt, control=k*dt) vs PID(dt=k*dt) held for k steps")
+print("=" * 60)
+plant = plants['Double-Well']
+z = np.random.default_rng(0).standard_normal((len(d), len(seeds)))
+pid_ok = True
+for k in (10, 50):
+    # Reference: a PID integrating at its own period k*dt, output held k steps
+    native = PID(dt=k * dt)
+    native.reset(len(seeds))
+    x_ref = np.empty((len(d) + 1, len(seeds)))
+    x_ref[0] = 1.0
+    u = 0.0
+    for t in range(len(d)):
+        if t % k == 0:
+            u = native(x_ref[t])
+        x_next = x_ref[t] + (plant.drift(x_ref[t]) + u + d[t]) * dt + plant.sigma * (np.sqrt(dt) * z[t])
+        x_ref[t + 1] = np.clip(x_next, *plant.clip)
+
+    controller = PID(dt=dt).at_rates(dt, control=k * dt, sample=k * dt)
+    controller.reset(len(seeds))
+    x_np = simulate_batch(plant.drift, d, 1.0, plant.sigma, dt, seeds, controller=controller,
+                          clip=plant.clip, every=controller.every,
+                          sample_every=controller.sample_every, z=z)
+    x_jit = jit.simulate_jit(plant, controller, d, 1.0, dt, seeds, z=z)
+    diff = max(np.max(np.abs(x_np - x_ref)), np.max(np.abs(x_jit - x_ref)))
+    pid_ok &= diff < 1e-9
+    print(f"control period {k * dt:4.2f}s   max|x - x_native| = {diff:.1e}")
+
+# --- 4. Per-Trial Parameters Fall Back to NumPy ---
+print()
+print("=" * 60)
+print("Per-trial gains with backend='jit'")
+print("=" * 60)
+n = len(seeds)
+cases = {
+    'C-SMC K, phi': (OU(theta=0.5, mu=1.0, sigma=0.05),
+                     CSMC(K=np.array([1.0, 2.0, 3.0]), phi=np.array([0.1, 0.2, 0.3]))),
+    # K, phi and r as long as the batch: must not be read as a parameter block
+    'C-SMC K, phi, r': (plants['Double-Well'],
+                        CSMC(K=np.full(n, 5.0), phi=np.full(n, 0.3), r=np.linspace(0.8, 1.2, n))),
+    'PID Kp': (plants['Double-Well'], PID(Kp=np.linspace(1.0, 3.0, n), dt=dt)),
+    'Double-Well a': (DoubleWell(a=np.linspace(1.0, 2.0, n), b=1.0, sigma=0.3, clip=(-1.5, 1.5)),
+                      CSMC(K=5.0, phi=0.3)),
+}
+fallback_ok = True
+disturbance = Disturbance(amplitude=0.2, period=300, pulse=-2.5, pulse_start=20, pulse_end=40)
+time = np.arange(0, T_check, dt)
+for name, (plant, controller) in cases.items():
+    backend = resolve_backend('jit', plant, controller)
+    x_jit = run(plant, controller, disturbance, time, dt, seeds, record=True, backend='jit')['x']
+    x_np = run(plant, controller, disturbance, time, dt, seeds, record=True)['x']
+    same = backend == 'numpy' and np.array_equal(x_jit, x_np)
+    fallback_ok &= same
+    print(f"{name:<16} backend={backend:<6} {'same as NumPy' if same else 'DIFFERS'}")
+
+# --- 5. Single-Trajectory Speed ---
+print()
+print("=" * 60)
+print("Single trajectory speed (Phase 1: Double-Well, 1s delay, 30 min)")
+print("=" * 60)
+time = np.linspace(0, T_total, int(T_total / dt))
+d = Disturbance(amplitude=0.3, period=150, pulse=-2.5).sample(time[:-1])
+plant = DoubleWell(a=0.5, b=1.0, sigma=0.05, clip=(-3, 3))
+controller = CSMC(K=8.0, phi=0.01, delay=100)
+
+def run_phase1_scalar():
+    """Original per-step loop of run_dw_simulation (Phase 1)"""
+    np.random.seed(0)
+    steps = len(time)
+    x = np.zeros(steps)
+    x[0] = 1.0
+    for t in range(steps - 1):
+        d_t = 0.3 * np.sin(2 * np.pi * (1/150) * time[t])
+        if 720.0 <= time[t] <= 840.0:
+            d_t += -2.5
+        curr_x = x[t]
+        if t > 100:
+            curr_x = x[t-100]
+        u_t = -8.0 * np.tanh((curr_x - 1.0) / 0.01)
+        noise = 0.05 * np.random.normal(0, np.sqrt(dt))
+        x[t+1] = x[t] + (0.5 * x[t] - 1.0 * (x[t]**3) + u_t + d_t) * dt + noise
+        if x[t+1] > 3: x[t+1] = 3
+        if x[t+1] < -3: x[t+1] = -3
+    return x
+
+jit.simulate_jit(plant, controller, d[:10], 1.0, dt, [0])  # Compile once
+
+t0 = timer.perf_counter()
+run_phase1_scalar()
+t_scalar = timer.perf_counter() - t0
+
+t0 = timer.perf_counter()
+x_ref = jit.simulate_jit(plant, controller, d, 1.0, dt, [0], kernel=jit.step_kernel.py_func)
+t_ref = timer.perf_counter() - t0
+
+t0 = timer.perf_counter()
+x_jit = jit.simulate_jit(plant, controller, d, 1.0, dt, [0])
+t_jit = timer.perf_counter() - t0
+
+speedup = t_scalar / t_jit
+print(f"Original loop: {t_scalar:.3f}s   Reference kernel: {t_ref:.3f}s   JIT: {t_jit:.4f}s")
+print(f"Speedup vs original loop: {speedup:.0f}x")
+all_exact &= np.array_equal(x_jit, x_ref)
+
+print()
+if pid_ok:
+    print("✓ PASS: Multi-rate PID matches the PID running at its own period")
+else:
+    print("✗ FAIL: Multi-rate PID integrates with the wrong step!")
+if fallback_ok:
+    print("✓ PASS: Per-trial parameters fall back to the NumPy engine")
+else:
+    print("✗ FAIL: Per-trial parameters are not handled by the fallback!")
+if all_exact:
+    print("✓ PASS: Compiled kernel reproduces the reference exactly")
+else:
+    print("✗ FAIL: Compiled kernel differs from the reference!")
+if jit.HAVE_NUMBA:
+    if speedup >= required_speedup:
+        print(f"✓ PASS: Single-trajectory speedup >= {required_speedup:.0f}x")
+    else:
+        print(f"✗ FAIL: Speedup {speedup:.0f}x is below {required_speedup:.0f}x")
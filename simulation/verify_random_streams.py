@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Counter-Based Random Stream Verification
+
+1. Any single trial regenerates in isolation, bit for bit
+2. A parallel sweep is bit-identical to the serial one
+3. A point's trials do not depend on the rest of the grid
+4. Substreams of different trials and points are uncorrelated
+"""
+import numpy as np
+
+from csmc import run, run_sweep, RandomStreams, OU, Disturbance, CSMC, Compliance
+
+T = 300.0
+dt = 0.01
+time = np.arange(0, T, dt)
+disturbance = Disturbance(amplitude=0.5, period=150, pulse=-1.6)
+n_trials = 40
+
+
+def simulate_point(point, seeds):
+    """Compliance of every trial at (K, phi)"""
+    K, phi = point
+    return run(OU(theta=0.5, mu=1.0, sigma=0.3), CSMC(K=K, phi=phi, r=1.0), disturbance,
+               time, dt, seeds, metrics={'compliance': Compliance()},
+               backend='jit')['compliance']
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Counter-Based Random Streams")
+    print("=" * 60)
+
+    for generator in ('philox', 'pcg64dxsm'):
+        streams = RandomStreams('verify', generator=generator)
+        points = [(1.0, 0.3), (2.0, 0.3), (5.0, 0.3)]
+        print(f"\n[{generator}]")
+
+        # 1. Trial 17 of point (2.0, 0.3) on its own
+        batch = simulate_point(points[1], streams.seeds(points[1], range(n_trials)))
+        alone = simulate_point(points[1], [streams.substream(points[1], 17)])
+        ok = batch[17] == alone[0]
+        print(f"{'✓ PASS' if ok else '✗ FAIL'}: trial 17 regenerated in isolation "
+              f"({alone[0]:.4f}%)")
+
+        # 2. Serial vs 4 workers with a different chunking
+        serial = run_sweep(simulate_point, points, n_trials, seed=streams, n_workers=1)
+        parallel = run_sweep(simulate_point, points, n_trials, seed=streams,
+                             chunk_size=7, n_workers=4)
+        ok = all(np.array_equal(a, b) for a, b in zip(serial, parallel))
+        print(f"{'✓ PASS' if ok else '✗ FAIL'}: parallel sweep bit-identical to serial")
+
+        # 3. Same point inside a reordered, larger grid
+        grid = [(5.0, 0.3), (3.0, 0.1), (2.0, 0.3)]
+        moved = run_sweep(simulate_point, grid, n_trials, seed=streams, n_workers=1)
+        ok = np.array_equal(moved[2], serial[1]) and np.array_equal(moved[0], serial[2])
+        print(f"{'✓ PASS' if ok else '✗ FAIL'}: point results independent of the grid")
+
+        # 4. Correlation between neighbouring substreams
+        z = np.array([streams.generator(p, k).standard_normal(100000)
+                      for p in points[:2] for k in range(2)])
+        corr = np.abs(np.corrcoef(z)[np.triu_indices(len(z), 1)]).max()
+        ok = corr < 5 / np.sqrt(z.shape[1])
+        print(f"{'✓ PASS' if ok else '✗ FAIL'}: max |corr| between substreams {corr:.4f}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Real-Time Service Shutdown Verification
+
+close() must stop ControlService.run() once the queued samples are
+processed, for both backpressure policies, even when
+1. the queue is full when close() is called (close must not wait for room)
+2. producers keep submitting after close() (with policy='drop_oldest' a
+   sample must never evict the end of the stream)
+3. producers are waiting for room when close() is called (policy='block'):
+   their samples must still be processed and none may stay blocked
+Samples submitted after close() are refused and counted, not queued.
+"""
+import asyncio
+
+from csmc import CSMC
+from csmc.realtime import ControlService
+
+queue_size = 4
+timeout = 2.0  # [s] run() must have returned by then
+
+
+async def close_on_full_queue(policy):
+    """Fill the queue, close, keep submitting, then start the consumer"""
+    service = ControlService(CSMC(K=5.0, phi=0.3, r=1.0), queue_size=queue_size, policy=policy)
+    for i in range(queue_size):
+        await service.submit(float(i), 1.0)
+    await asyncio.wait_for(service.close(), timeout)
+    for i in range(3):
+        await asyncio.wait_for(service.submit(float(queue_size + i), 1.0), timeout)
+    await asyncio.wait_for(service.run(), timeout)
+    return service.report()
+
+
+async def close_with_one_slot(policy):
+    """queue_size=1: close() fills the queue, then a submit that would evict the end of the stream"""
+    service = ControlService(CSMC(K=5.0, phi=0.3, r=1.0), queue_size=1, policy=policy)
+    await service.close()
+    await asyncio.wait_for(service.submit(0.0, 1.0), timeout)
+    await asyncio.wait_for(service.run(), timeout)
+    return service.report()
+
+
+async def close_with_waiting_producers(policy):
+    """Full queue plus three producers blocked on it when close() is called"""
+    service = ControlService(CSMC(K=5.0, phi=0.3, r=1.0), queue_size=2, policy=policy)
+    for i in range(2):
+        await service.submit(float(i), 1.0)
+    producers = [asyncio.create_task(service.submit(float(2 + i), 1.0)) for i in range(3)]
+    await asyncio.sleep(0)  # Let them block on the full queue
+    await service.close()
+    await asyncio.wait_for(service.run(), timeout)
+    await asyncio.wait_for(asyncio.gather(*producers), timeout)
+    if not service.queue.empty():
+        raise RuntimeError(f"{service.queue.qsize()} samples left in the queue")
+    return service.report()
+
+
+print("=" * 60)
+print("ControlService.close() with a full queue")
+print("=" * 60)
+all_ok = True
+for policy in ('block', 'drop_oldest'):
+    # (case, samples processed, samples refused); drop_oldest never waits,
+    # so its producers evict the oldest queued samples instead
+    cases = {'full queue': (close_on_full_queue, queue_size, 3),
+             'one slot': (close_with_one_slot, 0, 1),
+             'waiting': (close_with_waiting_producers, 5 if policy == 'block' else 2, 0)}
+    for name, (case, processed, refused) in cases.items():
+        try:
+            report = asyncio.run(case(policy))
+            ok = report['count'] == processed and report.get('refused', 0) == refused
+            detail = (f"processed={report['count']} refused={report.get('refused', 0)} "
+                      f"dropped={report['dropped']}")
+        except asyncio.TimeoutError:
+            ok = False
+            detail = f"did not stop within {timeout:.0f}s"
+        except RuntimeError as e:
+            ok = False
+            detail = str(e)
+        all_ok &= ok
+        print(f"{policy:<12} {name:<11} {'ok' if ok else 'NO':<3} {detail}")
+
+print()
+if all_ok:
+    print("✓ PASS: close() stops the service after every accepted sample, later ones are refused")
+else:
+    print("✗ FAIL: close() does not stop the service reliably!")